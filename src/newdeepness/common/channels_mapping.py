@@ -97,6 +97,10 @@ class ChannelsMapping:
             return False
         return True
 
+    def __hash__(self):
+        # consistent with `__eq__` - the (immutable) processing parameters containing the mapping are hashable
+        return hash(self._number_of_model_inputs)
+
     def get_as_default_mapping(self):
         """
         Get the same channels mapping as we have right now, but without the mapping itself
@@ -4,7 +4,7 @@ from newdeepness.common.processing_parameters.map_processing_parameters import M
 from newdeepness.processing.models.model_base import ModelBase
 
 
-@dataclass
+@dataclass(frozen=True)
 class DetectionParameters(MapProcessingParameters):
     """
     Parameters for Inference of detection model (including pre/post-processing) obtained from UI.
@@ -15,3 +15,5 @@ class DetectionParameters(MapProcessingParameters):
     confidence: float
     iou_threshold: float
     remove_overlapping_detections: bool  # whether overlapping detections can be deleted
+
+    batch_size: int = 1  # number of tiles processed at once, used only for models with a dynamic batch size
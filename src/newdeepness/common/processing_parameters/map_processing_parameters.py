@@ -1,3 +1,4 @@
+import dataclasses
 import enum
 from dataclasses import dataclass
 from typing import Optional
@@ -25,10 +26,11 @@ class ModelOutputFormat(enum.Enum):
         return [e.value for e in cls]
 
 
-@dataclass
+@dataclass(frozen=True)
 class MapProcessingParameters:
     """
     Common parameters for map processing obtained from UI.
+    Parameters are immutable - use `dataclasses.replace` to create a modified copy.
 
     TODO: Add default values here, to later set them in UI at startup
     """
@@ -65,3 +67,14 @@ class MapProcessingParameters:
     @property
     def processing_stride_px(self):
         return self.tile_size_px - self.processing_overlap_px
+
+    def get_common_fields(self) -> dict:
+        """
+        Get values of the common fields (defined in this class), e.g. to create a derived parameters class.
+        Note: `dataclasses.asdict` is not used, as it would deep-copy the model and the channels mapping
+        """
+        return {name: getattr(self, name) for name in _MAP_PROCESSING_PARAMETERS_FIELD_NAMES}
+
+
+# names of the fields of MapProcessingParameters, as `dataclasses.fields` introspection is slow to repeat
+_MAP_PROCESSING_PARAMETERS_FIELD_NAMES = tuple(field.name for field in dataclasses.fields(MapProcessingParameters))
@@ -7,7 +7,7 @@ from newdeepness.common.processing_parameters.map_processing_parameters import M
 from newdeepness.processing.models.model_base import ModelBase
 
 
-@dataclass
+@dataclass(frozen=True)
 class SuperresolutionParameters(MapProcessingParameters):
     """
     Parameters for Inference of Super Resolution model (including pre/post-processing) obtained from UI.
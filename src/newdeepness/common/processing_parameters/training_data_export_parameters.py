@@ -4,7 +4,7 @@ from typing import Optional
 from newdeepness.common.processing_parameters.map_processing_parameters import MapProcessingParameters
 
 
-@dataclass
+@dataclass(frozen=True)
 class TrainingDataExportParameters(MapProcessingParameters):
     """
     Parameters for Exporting Data obtained from UI.
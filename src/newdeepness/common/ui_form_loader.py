@@ -0,0 +1,81 @@
+"""
+This file contains utility to load form classes from the UI files (designed in QtDesigner)
+"""
+
+import hashlib
+import io
+import logging
+import marshal
+import os
+import sys
+
+from qgis.PyQt import uic
+from qgis.PyQt.QtCore import PYQT_VERSION_STR
+
+UI_CACHE_DIR_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'deepness', 'ui')
+
+
+def _get_cache_file_path(ui_file_path: str) -> str:
+    """ Get path of the cached compiled form.
+    It is unique for the ui file version, the PyQt version and the python interpreter (marshal format is not portable)
+    """
+    key = f'{ui_file_path}|{os.path.getmtime(ui_file_path)}|{PYQT_VERSION_STR}|{sys.version}'
+    key_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(UI_CACHE_DIR_PATH, f'{key_hash}.pyc')
+
+
+def _compile_ui_file(ui_file_path: str):
+    """ Run the pyuic compiler on the ui file and compile the resulting python code """
+    code_string = io.StringIO()
+    uic.compileUi(ui_file_path, code_string)
+    return compile(code_string.getvalue(), ui_file_path, 'exec')
+
+
+def _get_form_code(ui_file_path: str):
+    """ Get the compiled form code - from the disk cache if available, otherwise compile it and update the cache """
+    cache_file_path = _get_cache_file_path(ui_file_path)
+    try:
+        with open(cache_file_path, 'rb') as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass  # not cached yet (or invalid cache file) - just compile it again
+
+    code = _compile_ui_file(ui_file_path)
+
+    try:
+        os.makedirs(UI_CACHE_DIR_PATH, exist_ok=True)
+        tmp_file_path = f'{cache_file_path}.{os.getpid()}.tmp'
+        with open(tmp_file_path, 'wb') as f:
+            marshal.dump(code, f)
+        os.replace(tmp_file_path, cache_file_path)  # atomic, in case of multiple QGis instances
+    except OSError:
+        logging.warning(f"Failed to cache the compiled ui file '{ui_file_path}'", exc_info=True)
+
+    return code
+
+
+def load_ui_form_class(ui_file_path: str) -> type:
+    """ Load the form class from the ui file.
+    Equivalent of `uic.loadUiType(ui_file_path)[0]`, but the compiled form is cached on disk,
+    so that the pyuic compiler doesn't need to run on every plugin load.
+
+    Parameters
+    ----------
+    ui_file_path : str
+        Path to the ui file
+
+    Returns
+    -------
+    type
+        Form class (`Ui_...`), with the `setupUi` method
+    """
+    ui_file_path = os.path.abspath(ui_file_path)
+    code = _get_form_code(ui_file_path)
+
+    ui_globals = {}
+    exec(code, ui_globals)
+
+    for name, value in ui_globals.items():
+        if name.startswith('Ui_') and isinstance(value, type):
+            return value
+    raise Exception(f"No form class found in the ui file '{ui_file_path}'!")
@@ -24,7 +24,6 @@ from newdeepness.processing.map_processor.map_processing_result import (MapProce
                                                                         MapProcessingResultCanceled,
                                                                         MapProcessingResultFailed,
                                                                         MapProcessingResultSuccess)
-from newdeepness.processing.map_processor.map_processor_training_data_export import MapProcessorTrainingDataExport
 from newdeepness.processing.models.model_types import ModelDefinition
 
 cv2 = LazyPackageLoader('cv2')
@@ -241,6 +240,11 @@ class Deepness:
         if training_data_export_parameters.processed_area_type == ProcessedAreaType.FROM_POLYGONS:
             vlayer = QgsProject.instance().mapLayers()[training_data_export_parameters.mask_layer_id]
 
+        # imported here (as the model map processors, see `ModelDefinition.map_processor_class`),
+        # so that the processing modules are not loaded on the plugin start-up
+        from newdeepness.processing.map_processor.map_processor_training_data_export import \
+            MapProcessorTrainingDataExport
+
         self._map_processor = MapProcessorTrainingDataExport(
             rlayer=rlayer,
             vlayer_mask=vlayer,  # layer with masks
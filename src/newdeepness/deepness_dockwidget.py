@@ -2,13 +2,15 @@
 This file contain the main widget of the plugin
 """
 
+import dataclasses
+import functools
 import logging
 import os
-from typing import Optional
+from typing import Dict, Optional
 
 from qgis.core import Qgis, QgsMapLayerProxyModel, QgsProject
-from qgis.PyQt import QtWidgets, uic
-from qgis.PyQt.QtCore import pyqtSignal
+from qgis.PyQt import QtWidgets
+from qgis.PyQt.QtCore import QTimer, pyqtSignal
 from qgis.PyQt.QtWidgets import QComboBox, QFileDialog, QMessageBox
 
 from newdeepness.common.config_entry_key import ConfigEntryKey
@@ -21,13 +23,36 @@ from newdeepness.common.processing_parameters.regression_parameters import Regre
 from newdeepness.common.processing_parameters.segmentation_parameters import SegmentationParameters
 from newdeepness.common.processing_parameters.superresolution_parameters import SuperresolutionParameters
 from newdeepness.common.processing_parameters.training_data_export_parameters import TrainingDataExportParameters
+from newdeepness.common.ui_form_loader import load_ui_form_class
 from newdeepness.processing.models.model_base import ModelBase
 from newdeepness.processing.models.model_types import ModelDefinition, ModelType
 from newdeepness.widgets.input_channels_mapping.input_channels_mapping_widget import InputChannelsMappingWidget
 from newdeepness.widgets.training_data_export_widget.training_data_export_widget import TrainingDataExportWidget
 
-FORM_CLASS, _ = uic.loadUiType(os.path.join(
-    os.path.dirname(__file__), 'deepness_dockwidget.ui'))
+FORM_CLASS = load_ui_form_class(os.path.join(os.path.dirname(__file__), 'deepness_dockwidget.ui'))
+
+MODEL_FILE_DIALOG_TITLE = 'Select Model ONNX file...'
+MODEL_FILE_DIALOG_FILTER = 'All files (*.*);; ONNX files (*.onnx)'
+ERROR_MESSAGE_BOX_TITLE = "Error!"
+EXCEPTION_MESSAGE_LENGTH_LIMIT = 300
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_model(model_class: type, file_path: str, file_mtime: float) -> ModelBase:
+    """ Create the model wrapper (with its ONNX session), reusing the already created one
+    if the same model file is loaded again (e.g. with 'Reload Model' or from the config).
+    Only the last model is kept, so that sessions of the models not used anymore are released.
+    `file_mtime` is only a part of the cache key, so that a modified model file is loaded again.
+    """
+    return model_class(file_path)
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_model_type_from_metadata(file_path: str, file_mtime: float) -> Optional[str]:
+    """ Get the model type from the model file metadata. Only the type string is cached - the temporary
+    model session is released right away. `file_mtime` is only a part of the cache key, as in `_cached_model`.
+    """
+    return ModelBase.get_model_type_from_metadata(file_path)
 
 
 class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
@@ -47,6 +72,10 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         super(DeepnessDockWidget, self).__init__(parent)
         self.iface = iface
         self._model = None  # type: Optional[ModelBase]
+        self._model_definition_by_type_name = {}  # type: Dict[str, ModelDefinition]  # filled in _setup_misc_ui
+        self._processed_area_type_by_name = {}  # type: Dict[str, ProcessedAreaType]  # filled in _setup_misc_ui
+        self._model_output_format_by_name = {}  # type: Dict[str, ModelOutputFormat]  # filled in _setup_misc_ui
+        self._is_model_loading = False  # model from the config is loaded in the background after startup
         self.setupUi(self)
 
         self._input_channels_mapping_widget = InputChannelsMappingWidget(self)  # mapping of model and input ortophoto channels
@@ -82,14 +111,13 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             self._input_channels_mapping_widget.load_ui_from_config()
             self._training_data_export_widget.load_ui_from_config()
 
-            # NOTE: load the model after setting the model_type above
+            # NOTE: load the model after setting the model_type above.
+            # Loading the model may take a while, so it is done once the widget is already shown
             model_file_path = ConfigEntryKey.MODEL_FILE_PATH.get()
             if model_file_path:
                 self.lineEdit_modelPath.setText(model_file_path)
-                self._load_model_and_display_info(abort_if_no_file_path=True)  # to prepare other ui components
-
-            # needs to be loaded after the model is set up
-            self.comboBox_outputFormatClassNumber.setCurrentIndex(ConfigEntryKey.MODEL_OUTPUT_FORMAT_CLASS_NUMBER.get())
+            self._is_model_loading = True
+            QTimer.singleShot(0, self._load_model_from_config)
 
             self.doubleSpinBox_resolution_cm_px.setValue(ConfigEntryKey.PREPROCESSING_RESOLUTION.get())
             self.spinBox_processingTileOverlapPercentage.setValue(ConfigEntryKey.PREPROCESSING_TILES_OVERLAP.get())
@@ -113,6 +141,19 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         except:
             logging.exception("Failed to load the ui state from config!")
 
+    def _load_model_from_config(self):
+        """ Load the model (path already set from the config) and the UI values depending on it
+        """
+        try:
+            self._load_model_and_display_info(abort_if_no_file_path=True)  # to prepare other ui components
+
+            # needs to be loaded after the model is set up
+            self.comboBox_outputFormatClassNumber.setCurrentIndex(ConfigEntryKey.MODEL_OUTPUT_FORMAT_CLASS_NUMBER.get())
+        except:
+            logging.exception("Failed to load the model from config!")
+        finally:
+            self._is_model_loading = False
+
     def _save_ui_to_config(self):
         """ Save value from the UI forms to the project config
         """
@@ -153,6 +194,7 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         self._show_debug_warning()
         combobox = self.comboBox_processedAreaSelection
         for name in ProcessedAreaType.get_all_names():
+            self._processed_area_type_by_name[name] = ProcessedAreaType(name)
             combobox.addItem(name)
 
         self.verticalLayout_inputChannelsMapping.addWidget(self._input_channels_mapping_widget)
@@ -163,9 +205,11 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         self._set_processed_area_mask_options()
 
         for model_definition in ModelDefinition.get_model_definitions():
+            self._model_definition_by_type_name[model_definition.model_type.value] = model_definition
             self.comboBox_modelType.addItem(model_definition.model_type.value)
 
         for output_format_type in ModelOutputFormat.get_all_names():
+            self._model_output_format_by_name[output_format_type] = ModelOutputFormat(output_format_type)
             self.comboBox_modelOutputFormat.addItem(output_format_type)
         self._model_output_format_changed()
 
@@ -178,8 +222,7 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
 
     def get_selected_processed_area_type(self) -> ProcessedAreaType:
         combobox = self.comboBox_processedAreaSelection  # type: QComboBox
-        txt = combobox.currentText()
-        return ProcessedAreaType(txt)
+        return self._processed_area_type_by_name[combobox.currentText()]
 
     def _create_connections(self):
         self.pushButton_runInference.clicked.connect(self._run_inference)
@@ -219,8 +262,7 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         self.mGroupBox_superresolutionParameters.setEnabled(superresolution_enabled)
 
     def _model_output_format_changed(self):
-        txt = self.comboBox_modelOutputFormat.currentText()
-        model_output_format = ModelOutputFormat(txt)
+        model_output_format = self._get_selected_model_output_format()
         class_number_selection_enabled = bool(model_output_format == ModelOutputFormat.ONLY_SINGLE_CLASS_AS_LAYER)
         self.comboBox_outputFormatClassNumber.setEnabled(class_number_selection_enabled)
 
@@ -233,9 +275,9 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
     def _browse_model_path(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self,
-            'Select Model ONNX file...',
+            MODEL_FILE_DIALOG_TITLE,
             os.path.expanduser('~'),
-            'All files (*.*);; ONNX files (*.onnx)')
+            MODEL_FILE_DIALOG_FILTER)
         if file_path:
             self.lineEdit_modelPath.setText(file_path)
             self._load_model_and_display_info()
@@ -293,8 +335,10 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         Otherwise model_class_from_ui will be used
         """
         model_class = model_class_from_ui
+        file_path = os.path.abspath(file_path)
+        file_mtime = os.path.getmtime(file_path)
 
-        model_type_str_from_metadata = ModelBase.get_model_type_from_metadata(file_path)
+        model_type_str_from_metadata = _cached_model_type_from_metadata(file_path, file_mtime)
         if model_type_str_from_metadata is not None:
             model_type = ModelType(model_type_str_from_metadata)
             model_class = ModelDefinition.get_definition_for_type(model_type).model_class
@@ -302,7 +346,7 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
 
         print(f'{model_type_str_from_metadata = }, {model_class = }')
 
-        model = model_class(file_path)
+        model = _cached_model(model_class, file_path, file_mtime)
         return model
 
     def _load_model_and_display_info(self, abort_if_no_file_path: bool = False):
@@ -344,10 +388,11 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
                   "Model may be not usable."
             logging.exception(txt)
             self.spinBox_tileSize_px.setEnabled(True)
-            length_limit = 300
-            exception_msg = (str(e)[:length_limit] + '..') if len(str(e)) > length_limit else str(e)
+            exception_msg = str(e)
+            if len(exception_msg) > EXCEPTION_MESSAGE_LENGTH_LIMIT:
+                exception_msg = exception_msg[:EXCEPTION_MESSAGE_LENGTH_LIMIT] + '..'
             msg = txt + f'\n\nException: {exception_msg}'
-            QMessageBox.critical(self, "Error!", msg)
+            QMessageBox.critical(self, ERROR_MESSAGE_BOX_TITLE, msg)
 
         self.label_modelInfo.setText(txt)
         self._update_model_output_format_mapping()
@@ -362,8 +407,17 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             name = f'{output_number} - {self._model.get_channel_name(output_number)}'
             self.comboBox_outputFormatClassNumber.addItem(name)
 
-    def get_mask_layer_id(self):
-        if not self.get_selected_processed_area_type() == ProcessedAreaType.FROM_POLYGONS:
+    def _get_selected_model_output_format(self) -> ModelOutputFormat:
+        return self._model_output_format_by_name[self.comboBox_modelOutputFormat.currentText()]
+
+    def get_mask_layer_id(self, processed_area_type: Optional[ProcessedAreaType] = None):
+        """
+        Get id of the layer with the processed area mask, None if the processed area is not defined by polygons.
+        `processed_area_type` can be passed if it is already known, otherwise it is read from the UI
+        """
+        if processed_area_type is None:
+            processed_area_type = self.get_selected_processed_area_type()
+        if processed_area_type != ProcessedAreaType.FROM_POLYGONS:
             return None
 
         mask_layer_id = self.mMapLayerComboBox_areaMaskLayer.currentLayer().id()
@@ -389,19 +443,17 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         Get the currently selected model class (in UI)
         """
         model_type_txt = self.comboBox_modelType.currentText()
-        model_type = ModelType(model_type_txt)
-        model_definition = ModelDefinition.get_definition_for_type(model_type)
-        return model_definition
+        return self._model_definition_by_type_name[model_type_txt]
 
     def get_inference_parameters(self) -> MapProcessingParameters:
         """ Get the parameters for the model interface.
         The returned type is derived from `MapProcessingParameters` class, depending on the selected model type.
         """
-        map_processing_parameters = self._get_map_processing_parameters()
-
         if self._model is None:
             raise OperationFailedException("Please select and load a model first!")
 
+        map_processing_parameters = self._get_map_processing_parameters()
+
         model_type = self.get_selected_model_class_definition().model_type
         if model_type == ModelType.SEGMENTATION:
             params = self.get_segmentation_parameters(map_processing_parameters)
@@ -422,7 +474,7 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             if self.checkBox_removeSmallAreas.isChecked() else 0
 
         params = SegmentationParameters(
-            **map_processing_parameters.__dict__,
+            **map_processing_parameters.get_common_fields(),
             postprocessing_dilate_erode_size=postprocessing_dilate_erode_size,
             pixel_classification__probability_threshold=self._get_pixel_classification_threshold(),
             model=self._model,
@@ -431,7 +483,7 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
 
     def get_regression_parameters(self, map_processing_parameters: MapProcessingParameters) -> RegressionParameters:
         params = RegressionParameters(
-            **map_processing_parameters.__dict__,
+            **map_processing_parameters.get_common_fields(),
             output_scaling=self.doubleSpinBox_regressionScaling.value(),
             model=self._model,
         )
@@ -439,7 +491,7 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
 
     def get_superresolution_parameters(self, map_processing_parameters: MapProcessingParameters) -> SuperresolutionParameters:
         params = SuperresolutionParameters(
-            **map_processing_parameters.__dict__,
+            **map_processing_parameters.get_common_fields(),
             model=self._model,
             scale_factor=self.doubleSpinBox_superresolutionScaleFactor.value(),
             output_scaling=self.doubleSpinBox_superresolutionScaling.value(),
@@ -449,7 +501,7 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
     def get_detection_parameters(self, map_processing_parameters: MapProcessingParameters) -> DetectionParameters:
 
         params = DetectionParameters(
-            **map_processing_parameters.__dict__,
+            **map_processing_parameters.get_common_fields(),
             confidence=self.doubleSpinBox_confidence.value(),
             iou_threshold=self.doubleSpinBox_iouScore.value(),
             remove_overlapping_detections=self.checkBox_removeOverlappingDetections.isChecked(),
@@ -467,23 +519,28 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             resolution_cm_per_px=self.doubleSpinBox_resolution_cm_px.value(),
             tile_size_px=self.spinBox_tileSize_px.value(),
             processed_area_type=processed_area_type,
-            mask_layer_id=self.get_mask_layer_id(),
+            mask_layer_id=self.get_mask_layer_id(processed_area_type),
             input_layer_id=self._get_input_layer_id(),
             processing_overlap_percentage=self.spinBox_processingTileOverlapPercentage.value(),
             input_channels_mapping=self._input_channels_mapping_widget.get_channels_mapping(),
-            model_output_format=ModelOutputFormat(self.comboBox_modelOutputFormat.currentText()),
+            model_output_format=self._get_selected_model_output_format(),
             model_output_format__single_class_number=self.comboBox_outputFormatClassNumber.currentIndex(),
         )
         return params
 
     def _run_inference(self):
         # check_required_packages_and_install_if_necessary()
+        if self._is_model_loading:
+            msg = "Model is still loading, please try again in a moment."
+            self.iface.messageBar().pushMessage(PLUGIN_NAME, msg, level=Qgis.Info, duration=3)
+            return
+
         try:
             params = self.get_inference_parameters()
         except OperationFailedException as e:
             msg = str(e)
             self.iface.messageBar().pushMessage(PLUGIN_NAME, msg, level=Qgis.Warning, duration=7)
-            QMessageBox.critical(self, "Error!", msg)
+            QMessageBox.critical(self, ERROR_MESSAGE_BOX_TITLE, msg)
             return
 
         self._save_ui_to_config()
@@ -498,12 +555,13 @@ class DeepnessDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
 
             # Overwrite common parameter - we don't want channels mapping as for the model,
             # but just to take all channels
-            training_data_export_parameters.input_channels_mapping = \
-                self._input_channels_mapping_widget.get_channels_mapping_for_training_data_export()
+            training_data_export_parameters = dataclasses.replace(
+                training_data_export_parameters,
+                input_channels_mapping=self._input_channels_mapping_widget.get_channels_mapping_for_training_data_export())
         except OperationFailedException as e:
             msg = str(e)
             self.iface.messageBar().pushMessage(PLUGIN_NAME, msg, level=Qgis.Warning)
-            QMessageBox.critical(self, "Error!", msg)
+            QMessageBox.critical(self, ERROR_MESSAGE_BOX_TITLE, msg)
             return
 
         self._save_ui_to_config()
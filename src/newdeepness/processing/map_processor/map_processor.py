@@ -1,23 +1,31 @@
 """ This file implements core map processing logic """
 
+import collections
+import itertools
 import logging
-from typing import Optional, Tuple
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 import numpy as np
-from qgis.core import QgsRasterLayer, QgsTask, QgsVectorLayer
+from qgis.core import Qgis, QgsMessageLog, QgsRasterLayer, QgsTask, QgsVectorLayer
 from qgis.gui import QgsMapCanvas
-from qgis.PyQt.QtCore import pyqtSignal
+from qgis.PyQt.QtCore import QMetaObject, Qt, QTimer, pyqtSignal
 
-from newdeepness.common.defines import IS_DEBUG
+from newdeepness.common.defines import IS_DEBUG, LOG_TAB_NAME
 from newdeepness.common.lazy_package_loader import LazyPackageLoader
 from newdeepness.common.processing_parameters.map_processing_parameters import (MapProcessingParameters,
                                                                                 ProcessedAreaType)
-from newdeepness.processing import extent_utils, processing_utils
 from newdeepness.processing.map_processor.map_processing_result import MapProcessingResult, MapProcessingResultFailed
-from newdeepness.processing.tile_params import TileParams
 
 cv2 = LazyPackageLoader('cv2')
 
+# number of threads reading the tile images from the raster (raster reading mostly releases the GIL)
+TILES_PREFETCH_WORKERS = min(4, os.cpu_count() or 1)
+TILES_PREFETCH_DEPTH = 4  # default maximum number of tiles being read ahead of the processing
+PROGRESS_REPORT_INTERVAL_MS = 200
+
 
 class MapProcessor(QgsTask):
     """
@@ -50,12 +58,16 @@ class MapProcessor(QgsTask):
         params : MapProcessingParameters
            see MapProcessingParameters
         """
+        # imported here, as they are not needed until the processing starts (keeps the plugin start-up light)
+        from newdeepness.processing import extent_utils, processing_utils
+
         QgsTask.__init__(self, self.__class__.__name__)
         self._processing_finished = False
         self.rlayer = rlayer
         self.vlayer_mask = vlayer_mask
         self.params = params
-        self._assert_qgis_doesnt_need_reload()
+        if IS_DEBUG:  # the problem can happen only during the development
+            self._assert_qgis_doesnt_need_reload()
         self._processing_result = MapProcessingResultFailed('Failed to get processing result!')
 
         self.stride_px = self.params.processing_stride_px  # stride in pixels
@@ -77,9 +89,16 @@ class MapProcessor(QgsTask):
             params=self.params,
             rlayer_units_per_pixel=self.rlayer_units_per_pixel)
 
+        # local copies, not to query the extent and params again
+        extended_extent_width = self.extended_extent.width()
+        extended_extent_height = self.extended_extent.height()
+        rlayer_units_per_pixel = self.rlayer_units_per_pixel
+        tile_size_px = self.params.tile_size_px
+        stride_px = self.stride_px
+
         # processed rlayer dimensions (for extended_extent)
-        self.img_size_x_pixels = round(self.extended_extent.width() / self.rlayer_units_per_pixel)  # how many columns (x)
-        self.img_size_y_pixels = round(self.extended_extent.height() / self.rlayer_units_per_pixel)  # how many rows (y)
+        self.img_size_x_pixels = round(extended_extent_width / rlayer_units_per_pixel)  # how many columns (x)
+        self.img_size_y_pixels = round(extended_extent_height / rlayer_units_per_pixel)  # how many rows (y)
 
         # Coordinate of base image within extended image (images for base_extent and extended_extent)
         self.base_extent_bbox_in_full_image = extent_utils.calculate_base_extent_bbox_in_full_image(
@@ -90,10 +109,17 @@ class MapProcessor(QgsTask):
 
         # Number of tiles in x and y dimensions which will be used during processing
         # As we are using "extended_extent" this should divide without any rest
-        self.x_bins_number = round((self.img_size_x_pixels - self.params.tile_size_px)
-                                   / self.stride_px) + 1
-        self.y_bins_number = round((self.img_size_y_pixels - self.params.tile_size_px)
-                                   / self.stride_px) + 1
+        self.x_bins_number = round((self.img_size_x_pixels - tile_size_px) / stride_px) + 1
+        self.y_bins_number = round((self.img_size_y_pixels - tile_size_px) / stride_px) + 1
+        self._total_tiles = self.x_bins_number * self.y_bins_number
+        self._current_tile_no = 0  # updated while iterating over tiles
+
+        # Progress is reported periodically, not for every tile - signal emission for thousands of tiles
+        # would flood the event loop. The timer lives in the main thread (where the task is created),
+        # and it is running only while the processing is in progress (see `run`)
+        self._progress_timer = QTimer()
+        self._progress_timer.setInterval(PROGRESS_REPORT_INTERVAL_MS)
+        self._progress_timer.timeout.connect(self._report_progress)
 
         # Mask determining area to process (within extended_extent coordinates)
         self.area_mask_img = processing_utils.create_area_mask_image(
@@ -103,6 +129,44 @@ class MapProcessor(QgsTask):
             rlayer_units_per_pixel=self.rlayer_units_per_pixel,
             image_shape_yx=[self.img_size_y_pixels, self.img_size_x_pixels])  # type: Optional[np.ndarray]
 
+        # Which tiles (indexed with [y_bin_number, x_bin_number]) are to be processed
+        self._tiles_within_mask = self._calculate_tiles_within_mask()  # type: np.ndarray
+
+    def _calculate_tiles_within_mask(self) -> np.ndarray:
+        """
+        Check for all tiles at once whether they are within the mask image (i.e. whether there is any mask pixel
+        in the part of the tile copied to the full image), so that we don't need to create `TileParams`
+        for tiles that are going to be skipped anyway.
+        Number of mask pixels in each tile is obtained from the integral image of the mask, with 4 reads per tile.
+
+        Returns
+        -------
+        np.ndarray
+            Bool array with shape (y_bins_number, x_bins_number), True if the tile should be processed
+        """
+        from newdeepness.processing.tile_params import TileParams
+
+        if self.area_mask_img is None:
+            # if we don't have a mask, we are going to process all tiles
+            return np.ones((self.y_bins_number, self.x_bins_number), dtype=bool)
+
+        # integral image (summed area table) of the mask, shape (H+1, W+1). Only needed here, so not stored
+        mask_integral_img = cv2.integral(np.uint8(self.area_mask_img != 0))
+
+        x_min, x_max = TileParams.get_ranges_on_full_image_for_copying_for_all_bins(self.x_bins_number, self.params)
+        y_min, y_max = TileParams.get_ranges_on_full_image_for_copying_for_all_bins(self.y_bins_number, self.params)
+
+        # limit the ranges to the image, as slicing does. Upper values are exclusive now
+        image_size_y, image_size_x = mask_integral_img.shape[0] - 1, mask_integral_img.shape[1] - 1
+        x_min = np.clip(x_min, 0, image_size_x)
+        x_max = np.clip(x_max + 1, 0, image_size_x)
+        y_min = np.clip(y_min, 0, image_size_y)[:, np.newaxis]
+        y_max = np.clip(y_max + 1, 0, image_size_y)[:, np.newaxis]
+
+        pixels_in_mask = mask_integral_img[y_max, x_max] - mask_integral_img[y_min, x_max] \
+            - mask_integral_img[y_max, x_min] + mask_integral_img[y_min, x_min]
+        return pixels_in_mask > 0  # TODO - for training we can use tiles with higher coverage only
+
     def _assert_qgis_doesnt_need_reload(self):
         """ If the plugin is somehow invalid, it cannot compare the enums correctly
         I suppose it could be fixed somehow, but no need to investigate it now,
@@ -113,6 +177,8 @@ class MapProcessor(QgsTask):
             raise Exception("Disable plugin, restart QGis and enable plugin again!")
 
     def run(self):
+        # the timer can't be started or stopped directly from the task thread - do it in the timer thread
+        QMetaObject.invokeMethod(self._progress_timer, 'start', Qt.QueuedConnection)
         try:
             self._processing_result = self._run()
         except Exception as e:
@@ -121,6 +187,8 @@ class MapProcessor(QgsTask):
             self._processing_result = MapProcessingResultFailed(msg, exception=e)
             if IS_DEBUG:
                 raise e
+        finally:
+            QMetaObject.invokeMethod(self._progress_timer, 'stop', Qt.QueuedConnection)
 
         self._processing_finished = True
         return True
@@ -128,7 +196,11 @@ class MapProcessor(QgsTask):
     def _run(self) -> MapProcessingResult:
         return NotImplementedError
 
+    def _report_progress(self):
+        self.setProgress(self._current_tile_no / self._total_tiles * 100)
+
     def finished(self, result: bool):
+        self._progress_timer.stop()
         if not result:
             self._processing_result = MapProcessingResultFailed("Unhandled processing error!")
         self.finished_signal.emit(self._processing_result)
@@ -144,39 +216,109 @@ class MapProcessor(QgsTask):
         """
         Limit an image which is for extended_extent to the base_extent image.
         If a limiting polygon was used for processing, it will be also applied.
+        NOTE: the mask is applied in place - `full_img` is modified and the returned image is its view
         :param full_img:
         :return:
         """
-        # TODO look for some inplace operation to save memory
-        # cv2.copyTo(src=full_img, mask=area_mask_img, dst=full_img)  # this doesn't work due to implementation details
-        full_img = cv2.copyTo(src=full_img, mask=self.area_mask_img)
-
         b = self.base_extent_bbox_in_full_image
+        # crop first and apply the mask in place on the view - no temporary full-resolution copy of the image is created
         result_img = full_img[b.y_min:b.y_max+1, b.x_min:b.x_max+1]
+
+        if self.area_mask_img is not None:
+            area_mask_img = self.area_mask_img[b.y_min:b.y_max+1, b.x_min:b.x_max+1]
+            result_img[area_mask_img == 0] = 0  # for multi-channel images all channels are zeroed
+
         return result_img
 
-    def tiles_generator(self) -> Tuple[np.ndarray, TileParams]:
+    def tiles_generator_batched(self, batch_size: int) -> Tuple[np.ndarray, List['TileParams']]:
         """
-        Iterate over all tiles, as a Python generator function
+        Iterate over all tiles in batches, as a Python generator function (see `tiles_generator`).
+        Yields tile images stacked into an array [BATCH x SIZE x SIZE x CHANNELS] and a list with their tile params.
+        The last batch may be smaller than `batch_size`.
         """
-        total_tiles = self.x_bins_number * self.y_bins_number
-
-        for y_bin_number in range(self.y_bins_number):
-            for x_bin_number in range(self.x_bins_number):
-                tile_no = y_bin_number * self.x_bins_number + x_bin_number
-                progress = tile_no / total_tiles * 100
-                self.setProgress(progress)
-                print(f" Processing tile {tile_no} / {total_tiles} [{progress:.2f}%]")
-                tile_params = TileParams(
-                    x_bin_number=x_bin_number, y_bin_number=y_bin_number,
-                    x_bins_number=self.x_bins_number, y_bins_number=self.y_bins_number,
-                    params=self.params,
-                    processing_extent=self.extended_extent,
-                    rlayer_units_per_pixel=self.rlayer_units_per_pixel)
-
-                if not tile_params.is_tile_within_mask(self.area_mask_img):
-                    continue  # tile outside of mask - to be skipped
-
-                tile_img = processing_utils.get_tile_image(
-                    rlayer=self.rlayer, extent=tile_params.extent, params=self.params)
-                yield tile_img, tile_params
+        # read ahead (at least) two batches, so that the next batch is ready when the current one is processed
+        tiles = self.tiles_generator(tiles_prefetch_depth=max(TILES_PREFETCH_DEPTH, 2 * batch_size))
+        try:
+            while True:
+                batch = list(itertools.islice(tiles, batch_size))
+                if not batch:
+                    break
+                tile_imgs, tiles_params = zip(*batch)
+                yield np.stack(tile_imgs), list(tiles_params)
+        finally:
+            tiles.close()
+
+    def tiles_generator(self, tiles_prefetch_depth: int = TILES_PREFETCH_DEPTH) -> Tuple[np.ndarray, 'TileParams']:
+        """
+        Iterate over all tiles, as a Python generator function.
+        Tile images are read ahead in background threads, to overlap the raster reading with the processing.
+
+        Parameters
+        ----------
+        tiles_prefetch_depth : int
+            maximum number of tiles being read ahead (limits the memory usage)
+        """
+        from newdeepness.processing import processing_utils
+        from newdeepness.processing.tile_params import TileParams
+
+        total_tiles = self._total_tiles
+        # log the progress every 1% of tiles, not for every tile - it is too costly for thousands of tiles
+        log_progress_every_n_tiles = max(1, total_tiles // 100)
+        next_progress_log_tile_no = 0
+
+        # tile images are read from the raster in background threads, while the previous tiles are being processed.
+        # Data provider is not thread safe - every reading thread takes its own clone from the pool.
+        # Clones (and the layer properties) are obtained here, so that the layer is not accessed from the threads
+        data_providers_pool = queue.Queue()
+        for _ in range(TILES_PREFETCH_WORKERS):
+            data_providers_pool.put(self.rlayer.dataProvider().clone())
+        band_count = self.rlayer.bandCount()
+
+        def read_tile_image(tile_params: TileParams) -> np.ndarray:
+            data_provider = data_providers_pool.get()
+            try:
+                return processing_utils.get_tile_image(
+                    rlayer=self.rlayer, extent=tile_params.extent, params=self.params,
+                    data_provider=data_provider,
+                    rlayer_units_per_pixel=self.rlayer_units_per_pixel,
+                    band_count=band_count)
+            finally:
+                data_providers_pool.put(data_provider)
+
+        # tiles outside of mask are skipped
+        tiles_to_read = ((int(y_bin_number), int(x_bin_number))
+                         for y_bin_number, x_bin_number in np.argwhere(self._tiles_within_mask))
+        pending_tiles = collections.deque()  # (tile_no, tile_params, future of tile image), in the processing order
+
+        executor = ThreadPoolExecutor(max_workers=TILES_PREFETCH_WORKERS, thread_name_prefix='tile_reader')
+        try:
+            while True:
+                # keep a limited number of tiles read ahead, so that the memory usage doesn't grow
+                for y_bin_number, x_bin_number in itertools.islice(tiles_to_read,
+                                                                    tiles_prefetch_depth - len(pending_tiles)):
+                    tile_params = TileParams(
+                        x_bin_number=x_bin_number, y_bin_number=y_bin_number,
+                        x_bins_number=self.x_bins_number, y_bins_number=self.y_bins_number,
+                        params=self.params,
+                        processing_extent=self.extended_extent,
+                        rlayer_units_per_pixel=self.rlayer_units_per_pixel)
+                    tile_no = y_bin_number * self.x_bins_number + x_bin_number
+                    pending_tiles.append((tile_no, tile_params, executor.submit(read_tile_image, tile_params)))
+
+                if not pending_tiles:
+                    break
+
+                tile_no, tile_params, tile_img_future = pending_tiles.popleft()
+                self._current_tile_no = tile_no  # progress is reported by the progress timer
+                if tile_no >= next_progress_log_tile_no:
+                    next_progress_log_tile_no = tile_no + log_progress_every_n_tiles
+                    progress = tile_no / total_tiles * 100
+                    QgsMessageLog.logMessage(f"Processing tile {tile_no} / {total_tiles} [{progress:.2f}%]",
+                                             LOG_TAB_NAME, level=Qgis.Info)
+
+                yield tile_img_future.result(), tile_params
+        finally:
+            # e.g. if the processing was canceled - don't read the remaining tiles
+            for _, _, tile_img_future in pending_tiles:
+                tile_img_future.cancel()
+            executor.shutdown(wait=True)
@@ -36,17 +36,21 @@ class MapProcessorDetection(MapProcessorWithModel):
         )
         self._all_detections = None
 
+    def _get_batch_size(self) -> int:
+        # for models with a dynamic batch size, the batch size is selected in the parameters
+        return self.model.get_batch_size() or self.detection_parameters.batch_size
+
     def get_all_detections(self) -> List[Detection]:
         return self._all_detections
 
     def _run(self) -> MapProcessingResult:
         all_bounding_boxes = []  # type: List[Detection]
-        for tile_img, tile_params in self.tiles_generator():
+        for tile_imgs, tiles_params in self.tiles_generator_batched(self._get_batch_size()):
             if self.isCanceled():
                 return MapProcessingResultCanceled()
 
-            bounding_boxes_in_tile = self._process_tile(tile_img, tile_params)
-            all_bounding_boxes += bounding_boxes_in_tile
+            bounding_boxes_in_tiles = self._process_tiles(tile_imgs, tiles_params)
+            all_bounding_boxes += bounding_boxes_in_tiles
 
         if len(all_bounding_boxes) > 0:
             all_bounding_boxes_suppressed = self.apply_non_maximum_suppression(all_bounding_boxes)
@@ -158,14 +162,14 @@ class MapProcessorDetection(MapProcessorWithModel):
         bboxes = np.array(bboxes)
         probs = np.array(probs)
 
-        pick_ids = self.model.non_max_suppression_fast(bboxes, probs, self.detection_parameters.iou_threshold)
+        pick_ids = set(self.model.non_max_suppression_fast(bboxes, probs, self.detection_parameters.iou_threshold))
 
         filtered_bounding_boxes = [x for i, x in enumerate(bounding_boxes) if i in pick_ids]
 
         if self.detection_parameters.remove_overlapping_detections:
             filtered_bounding_boxes = sorted(filtered_bounding_boxes, reverse=True)
 
-            to_remove = []
+            to_remove = set()
             for i in range(len(filtered_bounding_boxes)):
                 if i in to_remove:
                     continue
@@ -175,7 +179,7 @@ class MapProcessorDetection(MapProcessorWithModel):
                     if i != j:
                         if filtered_bounding_boxes[i].bbox.calculate_intersection_over_smaler_area(
                                 filtered_bounding_boxes[j].bbox) > self.detection_parameters.iou_threshold:
-                            to_remove.append(j)
+                            to_remove.add(j)
 
             filtered_bounding_boxes = [x for i, x in enumerate(filtered_bounding_boxes) if i not in to_remove]
 
@@ -187,7 +191,9 @@ class MapProcessorDetection(MapProcessorWithModel):
         for det in bounding_boxes_relative:
             det.convert_to_global(offset_x=tile_params.start_pixel_x, offset_y=tile_params.start_pixel_y)
 
-    def _process_tile(self, tile_img: np.ndarray, tile_params: TileParams) -> np.ndarray:
-        bounding_boxes: List[Detection] = self.model.process(tile_img)
-        self.convert_bounding_boxes_to_absolute_positions(bounding_boxes, tile_params)
-        return bounding_boxes
+    def _process_tiles(self, tile_imgs: np.ndarray, tiles_params: List[TileParams]) -> List[Detection]:
+        all_bounding_boxes = []  # type: List[Detection]
+        for bounding_boxes, tile_params in zip(self.model.process_batch(tile_imgs), tiles_params):
+            self.convert_bounding_boxes_to_absolute_positions(bounding_boxes, tile_params)
+            all_bounding_boxes += bounding_boxes
+        return all_bounding_boxes
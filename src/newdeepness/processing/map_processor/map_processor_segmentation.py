@@ -1,5 +1,7 @@
 """ This file implements map processing for segmentation model """
 
+from typing import List
+
 import numpy as np
 from qgis.core import QgsProject, QgsVectorLayer
 
@@ -40,16 +42,16 @@ class MapProcessorSegmentation(MapProcessorWithModel):
     def _run(self) -> MapProcessingResult:
         final_shape_px = (self.img_size_y_pixels, self.img_size_x_pixels)
         full_result_img = np.zeros(final_shape_px, np.uint8)
-        for tile_img, tile_params in self.tiles_generator():
+        for tile_imgs, tiles_params in self.tiles_generator_batched(self._get_batch_size()):
             if self.isCanceled():
                 return MapProcessingResultCanceled()
 
-            # See note in the class description why are we adding/subtracting 1 here
-            tile_result = self._process_tile(tile_img) + 1
-
-            tile_params.set_mask_on_full_img(
-                tile_result=tile_result,
-                full_result_img=full_result_img)
+            tile_results = self._process_tiles(tile_imgs)
+            for tile_result, tile_params in zip(tile_results, tiles_params):
+                # See note in the class description why are we adding/subtracting 1 here
+                tile_params.set_mask_on_full_img(
+                    tile_result=tile_result + 1,
+                    full_result_img=full_result_img)
 
         blur_size = int(self.segmentation_parameters.postprocessing_dilate_erode_size // 2) * 2 + 1  # needs to be odd
         full_result_img = cv2.medianBlur(full_result_img, blur_size)
@@ -131,10 +133,10 @@ class MapProcessorSegmentation(MapProcessorWithModel):
             QgsProject.instance().addMapLayer(vlayer, False)
             group.addLayer(vlayer)
 
-    def _process_tile(self, tile_img: np.ndarray) -> np.ndarray:
+    def _process_tiles(self, tile_imgs: np.ndarray) -> List[np.ndarray]:
         # TODO - create proper mapping for output channels
-        result = self.model.process(tile_img)
-
-        result[result < self.segmentation_parameters.pixel_classification__probability_threshold] = 0.0
-        result = np.argmax(result, axis=0)
-        return result
+        results = []
+        for result in self.model.process_batch(tile_imgs):
+            result[result < self.segmentation_parameters.pixel_classification__probability_threshold] = 0.0
+            results.append(np.argmax(result, axis=0))
+        return results
@@ -42,14 +42,14 @@ class MapProcessorSuperresolution(MapProcessorWithModel):
         # NOTE: consider whether we can use float16/uint16 as datatype
         full_result_imgs = np.zeros(final_shape_px, np.float32)
 
-        for tile_img, tile_params in self.tiles_generator():
+        for tile_imgs, tiles_params in self.tiles_generator_batched(self._get_batch_size()):
             if self.isCanceled():
                 return MapProcessingResultCanceled()
 
-            tile_results = self._process_tile(tile_img)
-            full_result_imgs[int(tile_params.start_pixel_y*self.superresolution_parameters.scale_factor):int((tile_params.start_pixel_y+tile_params.stride_px)*self.superresolution_parameters.scale_factor),
-                             int(tile_params.start_pixel_x*self.superresolution_parameters.scale_factor):int((tile_params.start_pixel_x+tile_params.stride_px)*self.superresolution_parameters.scale_factor),
-                             :] = tile_results.transpose(1, 2, 0)  # transpose to chanels last
+            for tile_results, tile_params in zip(self._process_tiles(tile_imgs), tiles_params):
+                full_result_imgs[int(tile_params.start_pixel_y*self.superresolution_parameters.scale_factor):int((tile_params.start_pixel_y+tile_params.stride_px)*self.superresolution_parameters.scale_factor),
+                                 int(tile_params.start_pixel_x*self.superresolution_parameters.scale_factor):int((tile_params.start_pixel_x+tile_params.stride_px)*self.superresolution_parameters.scale_factor),
+                                 :] = tile_results.transpose(1, 2, 0)  # transpose to chanels last
 
         # plt.figure(); plt.imshow(full_result_img); plt.show(block=False); plt.pause(0.001)
         full_result_imgs = self.limit_extended_extent_image_to_base_extent_with_mask(full_img=full_result_imgs)
@@ -154,13 +154,14 @@ class MapProcessorSuperresolution(MapProcessorWithModel):
         driver.CreateCopy(file_path, grid_data, 0)
         print(f'***** {file_path = }')
 
-    def _process_tile(self, tile_img: np.ndarray) -> np.ndarray:
-        result = self.model.process(tile_img)
-        result[np.isnan(result)] = 0
-        result *= self.superresolution_parameters.output_scaling
+    def _process_tiles(self, tile_imgs: np.ndarray) -> List[np.ndarray]:
+        results = []
+        for result in self.model.process_batch(tile_imgs):
+            result[np.isnan(result)] = 0
+            result *= self.superresolution_parameters.output_scaling
 
-        # NOTE - currently we are saving result as float32, so we are losing some accuraccy.
-        # result = np.clip(result, 0, 255)  # old version with uint8_t - not used anymore
-        result = result.astype(np.float32)
+            # NOTE - currently we are saving result as float32, so we are losing some accuraccy.
+            # result = np.clip(result, 0, 255)  # old version with uint8_t - not used anymore
+            results.append(result.astype(np.float32))
 
-        return result
+        return results
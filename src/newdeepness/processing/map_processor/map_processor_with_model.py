@@ -20,6 +20,12 @@ class MapProcessorWithModel(MapProcessor):
             **kwargs)
         self.model = model
 
+    def _get_batch_size(self) -> int:
+        """
+        Number of tiles to process by the model at once - the model batch size, or 1 if the batch size is dynamic
+        """
+        return self.model.get_batch_size() or 1
+
     def _get_indexes_of_model_output_channels_to_create(self) -> List[int]:
         """
         Decide what model output channels/classes we want to use at presentation level
@@ -1,11 +1,11 @@
 """ Module including the class for the object detection task and related functions
 """
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 
-from newdeepness.processing.models.model_base import ModelBase
+from newdeepness.processing.models.model_base import ONNX_TYPE_TO_NUMPY_DTYPE, ModelBase
 from newdeepness.processing.processing_utils import BoundingBox
 
 
@@ -62,20 +62,58 @@ class Detector(ModelBase):
     Detector model is used for detection of objects in images. It is based on YOLOv5/YOLOv7 models style.
     """
 
-    def __init__(self, model_file_path: str):
+    def __init__(self, model_file_path: str, providers: Optional[List[str]] = None):
         """Initialize object detection model
 
         Parameters
         ----------
         model_file_path : str
-            Path to model file"""
-        super(Detector, self).__init__(model_file_path)
+            Path to model file
+        providers : Optional[List[str]]
+            ONNX Runtime execution providers to use, see `ModelBase`"""
+        super(Detector, self).__init__(model_file_path, providers=providers)
 
         self.confidence = None
         """float: Confidence threshold"""
         self.iou_threshold = None
         """float: IoU threshold"""
 
+        self._io_binding = None
+        """ort.IOBinding: Binding of the model outputs to `_output_buffers`, reused between the runs"""
+        self._output_buffers = None  # type: Optional[List[np.ndarray]]
+
+    def _are_output_shapes_static(self) -> bool:
+        """Check if the shapes of all model outputs are known (apart from the batch size), so that the output
+        buffers can be allocated before the run"""
+        return all(all(isinstance(dim, int) for dim in output.shape[1:])
+                   and output.type in ONNX_TYPE_TO_NUMPY_DTYPE
+                   for output in self.outputs_layers)
+
+    def _run_model(self, input_batch: np.ndarray) -> List[np.ndarray]:
+        """Run the model, writing the outputs into the buffers reused between the runs (with IOBinding),
+        instead of allocating new output arrays for each batch.
+        Models with dynamic output shapes are run without the binding.
+
+        Note that the returned outputs are overwritten by the next run.
+        """
+        if not self._are_output_shapes_static():
+            return super(Detector, self)._run_model(input_batch)
+
+        batch_size = input_batch.shape[0]
+        if self._output_buffers is None or self._output_buffers[0].shape[0] != batch_size:
+            self._io_binding = self.sess.io_binding()
+            self._output_buffers = []
+            for output in self.outputs_layers:
+                dtype = ONNX_TYPE_TO_NUMPY_DTYPE[output.type]
+                output_buffer = np.empty((batch_size, *output.shape[1:]), dtype=dtype)
+                self._io_binding.bind_output(
+                    output.name, 'cpu', 0, dtype, output_buffer.shape, output_buffer.ctypes.data)
+                self._output_buffers.append(output_buffer)
+
+        self._io_binding.bind_cpu_input(self.input_name, np.ascontiguousarray(input_batch))
+        self.sess.run_with_iobinding(self._io_binding)
+        return self._output_buffers
+
     def set_inference_params(self, confidence: float, iou_threshold: float):
         """Set inference parameters
 
@@ -127,10 +165,9 @@ class Detector(ModelBase):
         """
         img = image[:, :, : self.input_shape[-3]]
 
-        input_data = img / 255.0
+        input_data = self._convert_image_to_input_type(img)
         input_data = np.transpose(input_data, (2, 0, 1))
         input_batch = np.expand_dims(input_data, 0)
-        input_batch = input_batch.astype(np.float32)
 
         return input_batch
 
@@ -286,7 +323,7 @@ class Detector(ModelBase):
         Valid model are:
             - has 1 output layer
             - output layer shape length is 3
-            - batch size is 1
+            - batch size is equal to the input batch size (or both are dynamic)
         """
         if len(self.outputs_layers) == 1:
             shape = self.outputs_layers[0].shape
@@ -297,9 +334,11 @@ class Detector(ModelBase):
                     f"Actually has: {shape}"
                 )
 
-            if shape[0] != 1:
+            is_batch_size_dynamic = not isinstance(shape[0], int) and self.get_batch_size() is None
+            if shape[0] != self.input_shape[0] and not is_batch_size_dynamic:
                 raise Exception(
-                    f"Detection model can handle only 1-Batch outputs. Has {shape}"
+                    f"Detection model output batch size should be equal to the input batch size "
+                    f"({self.input_shape[0]}). Has {shape}"
                 )
 
         else:
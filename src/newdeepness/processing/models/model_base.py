@@ -1,5 +1,9 @@
 """ Module including the base model interfaces and utilities"""
+import hashlib
 import json
+import logging
+import os
+import tempfile
 from typing import List, Optional
 
 import numpy as np
@@ -8,31 +12,90 @@ from newdeepness.common.lazy_package_loader import LazyPackageLoader
 
 ort = LazyPackageLoader('onnxruntime')
 
+# execution providers of the ONNX Runtime, in the order of preference (unavailable ones are skipped)
+DEFAULT_EXECUTION_PROVIDERS = (
+    'CUDAExecutionProvider',
+    'CPUExecutionProvider',
+)
+
+# numpy data types for the supported types of the model input (and output) tensors
+ONNX_TYPE_TO_NUMPY_DTYPE = {
+    'tensor(float)': np.float32,
+    'tensor(float16)': np.float16,
+    'tensor(double)': np.float64,
+    'tensor(uint8)': np.uint8,
+}
+
+OPTIMIZED_MODELS_CACHE_DIR_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'deepness', 'models')
+
+
+def _get_optimized_model_file_path(model_file_path: str, providers: List[str]) -> str:
+    """ Get path of the cached optimized graph of the model.
+    The file name consists of two parts - the first one is unique for the model file path and the execution providers
+    (the optimized graph may contain nodes specific to them), the second one for the model file version
+    and the ONNX Runtime version (see `_remove_stale_optimized_models`)
+    """
+    model_file_path = os.path.abspath(model_file_path)
+    model_file_stat = os.stat(model_file_path)
+    model_key = f'{model_file_path}|{",".join(providers)}'
+    version_key = f'{model_file_stat.st_size}|{model_file_stat.st_mtime_ns}|{ort.__version__}'
+    model_hash = hashlib.sha1(model_key.encode('utf-8')).hexdigest()
+    version_hash = hashlib.sha1(version_key.encode('utf-8')).hexdigest()
+    return os.path.join(OPTIMIZED_MODELS_CACHE_DIR_PATH, f'{model_hash}_{version_hash}.onnx')
+
+
+def _remove_stale_optimized_models(optimized_model_file_path: str):
+    """ Remove the cached optimized graphs of the same model and execution providers,
+    but of other model file or ONNX Runtime versions - they would never be used again
+    """
+    model_hash_prefix = os.path.basename(optimized_model_file_path).split('_')[0] + '_'
+    for file_name in os.listdir(OPTIMIZED_MODELS_CACHE_DIR_PATH):
+        file_path = os.path.join(OPTIMIZED_MODELS_CACHE_DIR_PATH, file_name)
+        if file_name.startswith(model_hash_prefix) and file_path != optimized_model_file_path:
+            try:
+                os.remove(file_path)
+            except OSError:
+                logging.warning(f"Failed to remove the stale optimized model '{file_path}'", exc_info=True)
+
+
+def _remove_file_if_exists(file_path: str):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+def _get_model_type_from_session_metadata(sess: 'ort.InferenceSession') -> Optional[str]:
+    """ Get model type from metadata of the model loaded in the session """
+    meta = sess.get_modelmeta()
+    name = 'model_type'
+    if name in meta.custom_metadata_map:
+        value = json.loads(meta.custom_metadata_map[name])
+        return str(value).capitalize()
+    return None
+
 
 class ModelBase:
     """
     Wraps the ONNX model used during processing into a common interface
     """
 
-    def __init__(self, model_file_path: str):
+    def __init__(self, model_file_path: str, providers: Optional[List[str]] = None):
         """
 
         Parameters
         ----------
         model_file_path : str
             Path to the model file
+        providers : Optional[List[str]]
+            ONNX Runtime execution providers to use, in the order of preference. `DEFAULT_EXECUTION_PROVIDERS` if None
         """
         self.model_file_path = model_file_path
 
-        options = ort.SessionOptions()
-        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
-
-        providers = [
-            'CUDAExecutionProvider',
-            'CPUExecutionProvider'
-        ]
+        if providers is None:
+            providers = list(DEFAULT_EXECUTION_PROVIDERS)
 
-        self.sess = ort.InferenceSession(self.model_file_path, options=options, providers=providers)
+        self.sess = self._create_inference_session(providers)
         inputs = self.sess.get_inputs()
         if len(inputs) > 1:
             raise Exception("ONNX model: unsupported number of inputs")
@@ -40,9 +103,98 @@ class ModelBase:
 
         self.input_shape = input_0.shape
         self.input_name = input_0.name
+        if input_0.type not in ONNX_TYPE_TO_NUMPY_DTYPE:
+            raise Exception(f"ONNX model: unsupported input type {input_0.type}")
+        self.input_dtype = ONNX_TYPE_TO_NUMPY_DTYPE[input_0.type]
 
         self.outputs_layers = self.sess.get_outputs()
 
+        self._input_batch_buffer = None  # type: Optional[np.ndarray]  # reused between `process_batch` calls
+
+    def _create_inference_session(self, providers: List[str]) -> 'ort.InferenceSession':
+        """ Create the ONNX Runtime session for the model.
+
+        Graph optimizations are applied only once - the optimized graph is saved in the user cache directory
+        (see `_get_optimized_model_file_path`) and loaded instead of the original model later.
+        Only the hardware independent optimizations are saved, the remaining ones are applied when loading.
+        If the graph cannot be loaded, the original model is used (and the graph is saved again).
+
+        Parameters
+        ----------
+        providers : List[str]
+            ONNX Runtime execution providers to use
+
+        Returns
+        -------
+        ort.InferenceSession
+            Created session
+        """
+        # ONNX Runtime skips the unavailable providers
+        available_providers = ort.get_available_providers()
+        used_providers = [provider for provider in providers if provider in available_providers]
+        optimized_model_file_path = _get_optimized_model_file_path(self.model_file_path, used_providers)
+
+        if os.path.isfile(optimized_model_file_path):
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            try:
+                return ort.InferenceSession(optimized_model_file_path, sess_options=options, providers=providers)
+            except Exception:
+                logging.warning(f"Failed to load the optimized model '{optimized_model_file_path}', "
+                                f"using the original model", exc_info=True)
+
+        return self._create_inference_session_saving_optimized_model(providers)
+
+    def _create_inference_session_saving_optimized_model(self, providers: List[str]) -> 'ort.InferenceSession':
+        """ Create the ONNX Runtime session for the original model, saving its optimized graph in the cache.
+        The graph is written by the session itself, while it is created - so only the extended optimizations
+        are applied in this session. It is cached for the execution providers which the session actually uses.
+
+        Parameters
+        ----------
+        providers : List[str]
+            ONNX Runtime execution providers to use
+
+        Returns
+        -------
+        ort.InferenceSession
+            Created session
+        """
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+
+        tmp_file_path = None
+        try:
+            os.makedirs(OPTIMIZED_MODELS_CACHE_DIR_PATH, exist_ok=True)
+            tmp_file_descriptor, tmp_file_path = tempfile.mkstemp(suffix='.tmp.onnx',
+                                                                  dir=OPTIMIZED_MODELS_CACHE_DIR_PATH)
+            os.close(tmp_file_descriptor)
+            options.optimized_model_filepath = tmp_file_path
+        except OSError:
+            logging.warning("Failed to create the optimized model file in the cache", exc_info=True)
+
+        try:
+            sess = ort.InferenceSession(self.model_file_path, sess_options=options, providers=providers)
+        except Exception:
+            if tmp_file_path is None:
+                raise
+            # the optimized graph may not be serializable - create the session without saving it
+            logging.warning(f"Failed to cache the optimized model '{self.model_file_path}'", exc_info=True)
+            _remove_file_if_exists(tmp_file_path)
+            options.optimized_model_filepath = ''
+            return ort.InferenceSession(self.model_file_path, sess_options=options, providers=providers)
+
+        if tmp_file_path is not None:
+            try:
+                optimized_model_file_path = _get_optimized_model_file_path(self.model_file_path, sess.get_providers())
+                os.replace(tmp_file_path, optimized_model_file_path)  # atomic, in case of multiple QGis instances
+                _remove_stale_optimized_models(optimized_model_file_path)
+            except OSError:
+                logging.warning(f"Failed to cache the optimized model '{self.model_file_path}'", exc_info=True)
+                _remove_file_if_exists(tmp_file_path)
+
+        return sess
+
     @classmethod
     def get_model_type_from_metadata(cls, model_file_path: str) -> Optional[str]:
         """ Get model type from metadata
@@ -57,8 +209,11 @@ class ModelBase:
         Optional[str]
             Model type or None if not found
         """
-        model = cls(model_file_path)
-        return model.get_metadata_model_type()
+        # only the metadata is read - no need for the graph optimizations (nor for caching the optimized graph)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        sess = ort.InferenceSession(model_file_path, sess_options=options, providers=['CPUExecutionProvider'])
+        return _get_model_type_from_session_metadata(sess)
 
     def get_input_shape(self) -> tuple:
         """ Get shape of the input for the model
@@ -112,12 +267,7 @@ class ModelBase:
         Optional[str]
             Model type or None if not found
         """
-        meta = self.sess.get_modelmeta()
-        name = 'model_type'
-        if name in meta.custom_metadata_map:
-            value = json.loads(meta.custom_metadata_map[name])
-            return str(value).capitalize()
-        return None
+        return _get_model_type_from_session_metadata(self.sess)
 
     def get_metadata_resolution(self) -> Optional[float]:
         """ Get resolution from metadata if exists
@@ -259,6 +409,47 @@ class ModelBase:
         """
         return self.input_shape[-3]
 
+    def get_batch_size(self) -> Optional[int]:
+        """ Get batch size of the model input
+
+        Returns
+        -------
+        Optional[int]
+            Batch size, or None if the batch dimension is dynamic
+        """
+        batch_size = self.input_shape[0]
+        return batch_size if isinstance(batch_size, int) else None
+
+    def warmup(self):
+        """ Run a single inference on an empty input, so that the costly initialization done by the ONNX Runtime
+        on the first run (memory allocation, kernels selection) doesn't slow down the actual processing.
+        Skipped if the model input has dynamic dimensions (apart from the batch size)
+        """
+        input_shape = list(self.input_shape)
+        if self.get_batch_size() is None:
+            input_shape[0] = 1
+        if not all(isinstance(dim, int) for dim in input_shape):
+            return
+
+        self._run_model(np.zeros(input_shape, dtype=self.input_dtype))
+
+    def _run_model(self, input_batch: np.ndarray) -> List[np.ndarray]:
+        """ Run the model on the preprocessed input batch
+
+        Parameters
+        ----------
+        input_batch : np.ndarray
+            Model input, of the model input type
+
+        Returns
+        -------
+        List[np.ndarray]
+            Model outputs
+        """
+        return self.sess.run(
+            output_names=None,
+            input_feed={self.input_name: input_batch})
+
     def process(self, img):
         """ Process a single tile image
 
@@ -273,12 +464,76 @@ class ModelBase:
             Single prediction
         """
         input_batch = self.preprocessing(img)
-        model_output = self.sess.run(
-            output_names=None,
-            input_feed={self.input_name: input_batch})
+        model_output = self._run_model(input_batch)
         res = self.postprocessing(model_output)
         return res
 
+    def process_batch(self, imgs: np.ndarray) -> List:
+        """ Process a batch of tile images, with a single model run
+
+        Parameters
+        ----------
+        imgs : np.ndarray
+            Images to process ([BATCH x TILE_SIZE x TILE_SIZE x channels], type uint8, values 0 to 255).
+            For models with a fixed batch size, the batch can be smaller than the model batch size.
+            For models with a dynamic batch size, the whole batch is processed in a single run
+
+        Returns
+        -------
+        List
+            Predictions for each image (as returned by `process`)
+        """
+        number_of_imgs = len(imgs)
+        batch_size = self.get_batch_size() or number_of_imgs
+
+        input_batch = None
+        for i, img in enumerate(imgs):
+            input_img = self.preprocessing(img)
+            if input_batch is None:
+                input_batch = self._get_input_batch_buffer((batch_size, *input_img.shape[1:]), input_img.dtype)
+            input_batch[i:i+1] = input_img
+        # e.g. the last batch of tiles - fill it up, as the model requires the fixed batch size
+        input_batch[number_of_imgs:] = 0
+
+        model_output = self._run_model(input_batch)
+        # postprocessing expects outputs for a single image, as for the batch of size 1
+        return [self.postprocessing([output[i:i+1] for output in model_output]) for i in range(number_of_imgs)]
+
+    def _get_input_batch_buffer(self, shape: tuple, dtype) -> np.ndarray:
+        """ Get an array for the model input batch. The array is reused between the runs, as long as it is big enough,
+        so that a new batch doesn't need to be allocated for every run
+        """
+        buffer = self._input_batch_buffer
+        if buffer is None or buffer.shape[0] < shape[0] or buffer.shape[1:] != shape[1:] or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._input_batch_buffer = buffer
+        return buffer[:shape[0]]
+
+    def _convert_image_to_input_type(self, img: np.ndarray) -> np.ndarray:
+        """ Convert the image to the data type of the model input, to be used in `preprocessing`.
+        For float models the values are normalized to 0-1, directly in the target type (e.g. float16),
+        so that no bigger array than needed is created. Models with uint8 input (e.g. quantized ones)
+        do the normalization internally, so they get the raw 8-bit values
+
+        Parameters
+        ----------
+        img : np.ndarray
+            Image (H,W,C), values 0-255
+
+        Returns
+        -------
+        np.ndarray
+            Converted image (H,W,C)
+        """
+        if self.input_dtype == np.uint8:
+            if img.dtype != np.uint8:
+                raise Exception(f"Model with uint8 input requires an 8-bit raster, the raster data type is {img.dtype}")
+            return img
+
+        input_img = img.astype(self.input_dtype)
+        input_img /= 255
+        return input_img
+
     def preprocessing(self, img: np.ndarray) -> np.ndarray:
         """ Abstract method for preprocessing
 
@@ -290,7 +545,7 @@ class ModelBase:
         Returns
         -------
         np.ndarray
-            Preprocessed image
+            Preprocessed image (1,C,H,W), of the model input type (see `_convert_image_to_input_type`)
         """
         return NotImplementedError
 
@@ -1,82 +1,130 @@
 import enum
+import functools
+import importlib
 from dataclasses import dataclass
+from typing import Dict, List, Tuple
 
 from newdeepness.common.processing_parameters.detection_parameters import DetectionParameters
 from newdeepness.common.processing_parameters.map_processing_parameters import MapProcessingParameters
 from newdeepness.common.processing_parameters.regression_parameters import RegressionParameters
 from newdeepness.common.processing_parameters.segmentation_parameters import SegmentationParameters
 from newdeepness.common.processing_parameters.superresolution_parameters import SuperresolutionParameters
-from newdeepness.processing.map_processor.map_processor_detection import MapProcessorDetection
-from newdeepness.processing.map_processor.map_processor_regression import MapProcessorRegression
-from newdeepness.processing.map_processor.map_processor_segmentation import MapProcessorSegmentation
-from newdeepness.processing.map_processor.map_processor_superresolution import MapProcessorSuperresolution
-from newdeepness.processing.models.detector import Detector
-from newdeepness.processing.models.regressor import Regressor
-from newdeepness.processing.models.segmentor import Segmentor
-from newdeepness.processing.models.superresolution import Superresolution
 
 
-class ModelType(enum.Enum):
-    SEGMENTATION = Segmentor.get_class_display_name()
-    REGRESSION = Regressor.get_class_display_name()
-    DETECTION = Detector.get_class_display_name()
-    SUPERRESOLUTION = Superresolution.get_class_display_name()
+class ModelType(str, enum.Enum):
+    """ Type of the model. Members are also strings (their display names), so they compare and hash as strings """
+    SEGMENTATION = 'Segmentor'
+    REGRESSION = 'Regressor'
+    DETECTION = 'Detector'
+    SUPERRESOLUTION = 'Superresolution'
 
 
-@dataclass
+@functools.lru_cache(maxsize=None)
+def _import_class(class_path: str) -> type:
+    """ Import class from the path in format 'package.module:ClassName' """
+    module_name, class_name = class_path.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+@dataclass(frozen=True)
 class ModelDefinition:
+    """
+    Definition of classes used for a model type. Definitions are immutable (and hashable),
+    as they are shared by all users of the registry.
+    Model and map processor classes are imported only when used, as they pull heavy dependencies
+    (which would slow down the plugin start-up).
+    """
     model_type: ModelType
-    model_class: type
+    model_class_path: str  # path to the model class, in format 'package.module:ClassName'
     parameters_class: type
-    map_processor_class: type
+    map_processor_class_path: str  # path to the map processor class, in format 'package.module:ClassName'
+
+    @property
+    def model_class(self) -> type:
+        return _import_class(self.model_class_path)
+
+    @property
+    def map_processor_class(self) -> type:
+        return _import_class(self.map_processor_class_path)
 
     @classmethod
-    def get_model_definitions(cls):
-        return [
-            cls(
-                model_type=ModelType.SEGMENTATION,
-                model_class=Segmentor,
-                parameters_class=SegmentationParameters,
-                map_processor_class=MapProcessorSegmentation,
-            ),
-            cls(
-                model_type=ModelType.REGRESSION,
-                model_class=Regressor,
-                parameters_class=RegressionParameters,
-                map_processor_class=MapProcessorRegression,
-            ),
-            cls(
-                model_type=ModelType.DETECTION,
-                model_class=Detector,
-                parameters_class=DetectionParameters,
-                map_processor_class=MapProcessorDetection,
-            ),  # superresolution
-            cls(
-                model_type=ModelType.SUPERRESOLUTION,
-                model_class=Superresolution,
-                parameters_class=SuperresolutionParameters,
-                map_processor_class=MapProcessorSuperresolution,
-            )
-
-        ]
+    def get_model_definitions(cls) -> Tuple['ModelDefinition', ...]:
+        """ get definitions of all model types. Returned tuple is shared - it is not copied on every call """
+        return _MODEL_DEFINITIONS
 
     @classmethod
     def get_definition_for_type(cls, model_type: ModelType):
-        model_definitions = cls.get_model_definitions()
-        for model_definition in model_definitions:
-            if model_definition.model_type == model_type:
-                return model_definition
-        raise Exception(f"Unknown model type: '{model_type}'!")
+        try:
+            return _MODEL_DEFINITION_BY_TYPE[model_type]
+        except KeyError:
+            raise Exception(f"Unknown model type: '{model_type}'!")
 
     @classmethod
     def get_definition_for_params(cls, params: MapProcessingParameters):
         """ get model definition corresponding to the specified parameters """
-        model_definitions = cls.get_model_definitions()
-        for model_definition in model_definitions:
-            if type(params) == model_definition.parameters_class:
-                return model_definition
+        model_definition = _MODEL_DEFINITION_BY_PARAMETERS_CLASS.get(type(params))
+        if model_definition is not None:
+            return model_definition
 
-        for model_definition in model_definitions:
-            if isinstance(params, model_definition.parameters_class):
+        # parameters class derived from a known class after the registry was created - walk over the base classes
+        for params_class in type(params).__mro__:
+            model_definition = _MODEL_DEFINITION_BY_PARAMETERS_CLASS.get(params_class)
+            if model_definition is not None:
+                _MODEL_DEFINITION_BY_PARAMETERS_CLASS[type(params)] = model_definition
                 return model_definition
         raise Exception(f"Unknown model type for parameters: '{params}'!")
+
+
+def _get_all_subclasses(cls: type) -> List[type]:
+    """ get all (direct and indirect) subclasses of the class """
+    subclasses = []
+    for subclass in cls.__subclasses__():
+        subclasses.append(subclass)
+        subclasses += _get_all_subclasses(subclass)
+    return subclasses
+
+
+def _create_model_definition_by_parameters_class(
+        model_definitions: Tuple[ModelDefinition, ...]) -> Dict[type, ModelDefinition]:
+    """ create the lookup of model definitions by the parameters class. It includes the parameters classes
+    derived from the known ones too, so that they are found with a single lookup
+    """
+    model_definition_by_parameters_class = {
+        model_definition.parameters_class: model_definition for model_definition in model_definitions}
+    for model_definition in model_definitions:
+        for params_subclass in _get_all_subclasses(model_definition.parameters_class):
+            model_definition_by_parameters_class.setdefault(params_subclass, model_definition)
+    return model_definition_by_parameters_class
+
+
+# created once, as the definitions are static and the lookups are done on every UI event
+_MODEL_DEFINITIONS = (
+    ModelDefinition(
+        model_type=ModelType.SEGMENTATION,
+        model_class_path='newdeepness.processing.models.segmentor:Segmentor',
+        parameters_class=SegmentationParameters,
+        map_processor_class_path='newdeepness.processing.map_processor.map_processor_segmentation:MapProcessorSegmentation',
+    ),
+    ModelDefinition(
+        model_type=ModelType.REGRESSION,
+        model_class_path='newdeepness.processing.models.regressor:Regressor',
+        parameters_class=RegressionParameters,
+        map_processor_class_path='newdeepness.processing.map_processor.map_processor_regression:MapProcessorRegression',
+    ),
+    ModelDefinition(
+        model_type=ModelType.DETECTION,
+        model_class_path='newdeepness.processing.models.detector:Detector',
+        parameters_class=DetectionParameters,
+        map_processor_class_path='newdeepness.processing.map_processor.map_processor_detection:MapProcessorDetection',
+    ),
+    ModelDefinition(
+        model_type=ModelType.SUPERRESOLUTION,
+        model_class_path='newdeepness.processing.models.superresolution:Superresolution',
+        parameters_class=SuperresolutionParameters,
+        map_processor_class_path='newdeepness.processing.map_processor.map_processor_superresolution:MapProcessorSuperresolution',
+    ),
+)
+
+_MODEL_DEFINITION_BY_TYPE = {
+    model_definition.model_type: model_definition for model_definition in _MODEL_DEFINITIONS}
+_MODEL_DEFINITION_BY_PARAMETERS_CLASS = _create_model_definition_by_parameters_class(_MODEL_DEFINITIONS)
@@ -34,12 +34,11 @@ class Segmentor(ModelBase):
         Returns
         -------
         np.ndarray
-            Preprocessed image (1,C,H,W), RGB, 0-1
+            Preprocessed image (1,C,H,W), RGB, 0-1 (or 0-255 for uint8 models), of the model input type
         """
         img = image[:, :, :self.input_shape[-3]]
 
-        input_batch = img.astype('float32')
-        input_batch /= 255
+        input_batch = self._convert_image_to_input_type(img)
         input_batch = input_batch.transpose(2, 0, 1)
         input_batch = np.expand_dims(input_batch, axis=0)
 
@@ -93,7 +92,7 @@ class Segmentor(ModelBase):
         Valid means that:
         - the model has only one output
         - the output is 4D (N,C,H,W)
-        - the batch size is 1
+        - the batch size is equal to the input batch size
         - model resolution is equal to TILE_SIZE (is square)
 
         """
@@ -103,8 +102,8 @@ class Segmentor(ModelBase):
             if len(shape) != 4:
                 raise Exception(f'Segmentation model output should have 4 dimensions: (B,C,H,W). Has {shape}')
 
-            if shape[0] != 1:
-                raise Exception(f'Segmentation model can handle only 1-Batch outputs. Has {shape}')
+            if shape[0] != self.input_shape[0]:
+                raise Exception(f'Segmentation model output batch size should be equal to the input batch size ({self.input_shape[0]}). Has {shape}')
 
             if shape[2] != shape[3]:
                 raise Exception(f'Segmentation model can handle only square outputs masks. Has: {shape}')
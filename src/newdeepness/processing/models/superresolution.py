@@ -34,12 +34,11 @@ class Superresolution(ModelBase):
         Returns
         -------
         np.ndarray
-            Preprocessed image (1,C,H,W), RGB, 0-1
+            Preprocessed image (1,C,H,W), RGB, 0-1 (or 0-255 for uint8 models), of the model input type
         """
         img = image[:, :, :self.input_shape[-3]]
 
-        input_batch = img.astype('float32')
-        input_batch /= 255
+        input_batch = self._convert_image_to_input_type(img)
         input_batch = input_batch.transpose(2, 0, 1)
         input_batch = np.expand_dims(input_batch, axis=0)
 
@@ -104,7 +103,7 @@ class Superresolution(ModelBase):
         Correct means that:
         - there is only one output layer
         - output layer has 1 channel
-        - batch size is 1
+        - batch size is equal to the input batch size
         - output resolution is square
         """
         if len(self.outputs_layers) == 1:
@@ -114,8 +113,8 @@ class Superresolution(ModelBase):
                 raise Exception(f'Regression model output should have 4 dimensions: (Batch_size, Channels, H, W). \n'
                                 f'Actually has: {shape}')
 
-            if shape[0] != 1:
-                raise Exception(f'Regression model can handle only 1-Batch outputs. Has {shape}')
+            if shape[0] != self.input_shape[0]:
+                raise Exception(f'Regression model output batch size should be equal to the input batch size ({self.input_shape[0]}). Has {shape}')
 
             if shape[2] != shape[3]:
                 raise Exception(f'Regression model can handle only square outputs masks. Has: {shape}')
@@ -7,8 +7,8 @@ from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
 import numpy as np
-from qgis.core import (Qgis, QgsCoordinateTransform, QgsFeature, QgsGeometry, QgsPointXY, QgsRasterLayer, QgsRectangle,
-                       QgsUnitTypes, QgsWkbTypes)
+from qgis.core import (Qgis, QgsCoordinateTransform, QgsFeature, QgsGeometry, QgsPointXY, QgsRasterDataProvider,
+                       QgsRasterLayer, QgsRectangle, QgsUnitTypes, QgsWkbTypes)
 
 from newdeepness.common.defines import IS_DEBUG
 from newdeepness.common.lazy_package_loader import LazyPackageLoader
@@ -49,7 +49,10 @@ def get_numpy_data_type_for_qgis_type(data_type_qgis: Qgis.DataType):
 def get_tile_image(
         rlayer: QgsRasterLayer,
         extent: QgsRectangle,
-        params: MapProcessingParameters) -> np.ndarray:
+        params: MapProcessingParameters,
+        data_provider: Optional[QgsRasterDataProvider] = None,
+        rlayer_units_per_pixel: Optional[float] = None,
+        band_count: Optional[int] = None) -> np.ndarray:
     """_summary_
 
     Parameters
@@ -60,6 +63,15 @@ def get_tile_image(
         extent of the image to extract
     params : MapProcessingParameters
         map processing parameters
+    data_provider : Optional[QgsRasterDataProvider]
+        data provider to read the image with, `rlayer.dataProvider()` if None.
+        Data providers are not thread safe - when reading in multiple threads, each one needs its own clone
+    rlayer_units_per_pixel : Optional[float]
+        number of rlayer units for one tile pixel (for `params.resolution_cm_per_px`), calculated if None
+    band_count : Optional[int]
+        number of bands in the rlayer, `rlayer.bandCount()` if None.
+        When reading in multiple threads, this and `rlayer_units_per_pixel` should be given,
+        so that the rlayer is not accessed from the threads
 
     Returns
     -------
@@ -67,8 +79,10 @@ def get_tile_image(
        extracted image [SIZE x SIZE x CHANNELS]. Probably RGBA channels
     """
 
-    expected_meters_per_pixel = params.resolution_cm_per_px / 100
-    expected_units_per_pixel = convert_meters_to_rlayer_units(rlayer, expected_meters_per_pixel)
+    if rlayer_units_per_pixel is None:
+        expected_meters_per_pixel = params.resolution_cm_per_px / 100
+        rlayer_units_per_pixel = convert_meters_to_rlayer_units(rlayer, expected_meters_per_pixel)
+    expected_units_per_pixel = rlayer_units_per_pixel
     expected_units_per_pixel_2d = expected_units_per_pixel, expected_units_per_pixel
     # to get all pixels - use the 'rlayer.rasterUnitsPerPixelX()' instead of 'expected_units_per_pixel_2d'
     image_size = round((extent.width()) / expected_units_per_pixel_2d[0]), \
@@ -79,7 +93,8 @@ def get_tile_image(
     assert image_size[1] == params.tile_size_px
 
     # enable resampling
-    data_provider = rlayer.dataProvider()
+    if data_provider is None:
+        data_provider = rlayer.dataProvider()
     if data_provider is None:
         raise Exception("Somehow invalid rlayer!")
     data_provider.enableProviderResampling(True)
@@ -88,7 +103,7 @@ def get_tile_image(
     data_provider.setZoomedOutResamplingMethod(data_provider.ResamplingMethod.Bilinear)
 
     def get_raster_block(band_number_):
-        raster_block = rlayer.dataProvider().block(
+        raster_block = data_provider.block(
             band_number_,
             extent,
             image_size[0], image_size[1])
@@ -102,7 +117,8 @@ def get_tile_image(
     tile_data = []
 
     if input_channels_mapping.are_all_inputs_standalone_bands():
-        band_count = rlayer.bandCount()
+        if band_count is None:
+            band_count = rlayer.bandCount()
         for i in range(number_of_model_inputs):
             image_channel = input_channels_mapping.get_image_channel_for_model_input(i)
             band_number = image_channel.get_band_number()
@@ -447,7 +463,6 @@ def create_area_mask_image(vlayer_mask,
 
     # see https://docs.qgis.org/3.22/en/docs/pyqgis_developer_cookbook/vector.html#iterating-over-vector-layer
     for feature in features:
-        print("Feature ID: ", feature.id())
         geom = feature.geometry()
 
         if vlayer_mask.crs() != rlayer.crs():
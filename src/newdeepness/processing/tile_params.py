@@ -3,16 +3,13 @@ This file contains utilities related to processing a tile.
 Tile is a small part of the ortophoto, which is being processed by the model one by one.
 """
 
-from typing import Optional, Tuple
+from typing import Tuple
 
 import numpy as np
 from qgis.core import QgsRectangle
 
-from newdeepness.common.lazy_package_loader import LazyPackageLoader
 from newdeepness.common.processing_parameters.map_processing_parameters import MapProcessingParameters
 
-cv2 = LazyPackageLoader('cv2')
-
 
 class TileParams:
     """ Defines a single tile parameters - image that's being processed by model"""
@@ -115,6 +112,39 @@ class TileParams:
         roi_slice = np.s_[y_min:y_max + 1, x_min:x_max + 1]
         return roi_slice
 
+    @staticmethod
+    def get_ranges_on_full_image_for_copying_for_all_bins(
+            bins_number: int,
+            params: MapProcessingParameters) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized version of `get_slice_on_full_image_for_copying`, for all tiles along one axis (x or y).
+
+        Parameters
+        ----------
+        bins_number : int
+            how many tiles are there along the axis
+        params : MapProcessingParameters
+            processing parameters
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Minimum and maximum (inclusive) pixel coordinates of the copied part, for each tile along the axis
+        """
+        stride_px = params.processing_stride_px
+        half_overlap = (params.tile_size_px - stride_px) // 2
+
+        start_pixels = np.arange(bins_number) * stride_px
+        min_pixels = start_pixels + half_overlap
+        max_pixels = start_pixels + params.tile_size_px - half_overlap - 1
+
+        # edge tiles handling
+        if bins_number > 0:
+            min_pixels[0] -= half_overlap
+            max_pixels[-1] += half_overlap
+
+        return min_pixels, max_pixels
+
     def get_slice_on_tile_image_for_copying(self, roi_slice_on_full_image=None):
         """
         Similar to _get_slice_on_full_image_for_copying, but ROI is a slice on the tile
@@ -129,22 +159,6 @@ class TileParams:
         ]
         return roi_slice_on_tile
 
-    def is_tile_within_mask(self, mask_img: Optional[np.ndarray]):
-        """
-        To check if tile is within the mask image
-        """
-        if mask_img is None:
-            return True  # if we don't have a mask, we are going to process all tiles
-
-        roi_slice = self.get_slice_on_full_image_for_copying()
-        mask_roi = mask_img[roi_slice]
-        # check corners first
-        if mask_roi[0, 0] and mask_roi[1, -1] and mask_roi[-1, 0] and mask_roi[-1, -1]:
-            return True  # all corners in mask, almost for sure a good tile
-
-        coverage_percentage = cv2.countNonZero(mask_roi) / (mask_roi.shape[0] * mask_roi.shape[1]) * 100
-        return coverage_percentage > 0  # TODO - for training we can use tiles with higher coverage only
-
     def set_mask_on_full_img(self, full_result_img, tile_result):
         roi_slice_on_full_image = self.get_slice_on_full_image_for_copying()
         roi_slice_on_tile_image = self.get_slice_on_tile_image_for_copying(roi_slice_on_full_image)
@@ -7,16 +7,16 @@ import os
 from typing import List, Optional
 
 from qgis.core import Qgis, QgsRasterLayer
-from qgis.PyQt import QtWidgets, uic
+from qgis.PyQt import QtWidgets
 from qgis.PyQt.QtWidgets import QComboBox, QLabel
 
 from newdeepness.common.channels_mapping import (ChannelsMapping, ImageChannel, ImageChannelCompositeByte,
                                                  ImageChannelStandaloneBand)
 from newdeepness.common.config_entry_key import ConfigEntryKey
+from newdeepness.common.ui_form_loader import load_ui_form_class
 from newdeepness.processing.models.model_base import ModelBase
 
-FORM_CLASS, _ = uic.loadUiType(os.path.join(
-    os.path.dirname(__file__), 'input_channels_mapping_widget.ui'))
+FORM_CLASS = load_ui_form_class(os.path.join(os.path.dirname(__file__), 'input_channels_mapping_widget.ui'))
 
 
 class InputChannelsMappingWidget(QtWidgets.QWidget, FORM_CLASS):
@@ -34,6 +34,8 @@ class InputChannelsMappingWidget(QtWidgets.QWidget, FORM_CLASS):
         self._rlayer: QgsRasterLayer = rlayer
         self._create_connections()
         self._channels_mapping = ChannelsMapping()
+        # default mapping created from `_channels_mapping`, cached until the model or the image channels change
+        self._default_channels_mapping: Optional[ChannelsMapping] = None
 
         self._channels_mapping_labels: List[QLabel] = []
         self._channels_mapping_comboboxes: List[QComboBox] = []
@@ -48,6 +50,7 @@ class InputChannelsMappingWidget(QtWidgets.QWidget, FORM_CLASS):
             mapping_list_str = ConfigEntryKey.INPUT_CHANNELS_MAPPING__MAPPING_LIST_STR.get()
             mapping_list = [int(v) for v in mapping_list_str]
             self._channels_mapping.load_mapping_from_list(mapping_list)
+            self._default_channels_mapping = None
 
     def save_ui_to_config(self):
         is_advanced_mode = self.radioButton_advancedMapping.isChecked()
@@ -61,7 +64,9 @@ class InputChannelsMappingWidget(QtWidgets.QWidget, FORM_CLASS):
     def get_channels_mapping(self) -> ChannelsMapping:
         """ Get the channels mapping currently selected in the UI """
         if self.radioButton_defaultMapping.isChecked():
-            return self._channels_mapping.get_as_default_mapping()
+            if self._default_channels_mapping is None:
+                self._default_channels_mapping = self._channels_mapping.get_as_default_mapping()
+            return self._default_channels_mapping
         else:  # advanced mapping
             return self._channels_mapping
 
@@ -87,6 +92,7 @@ class InputChannelsMappingWidget(QtWidgets.QWidget, FORM_CLASS):
         number_of_channels = self._model_wrapper.get_number_of_channels()
         self.label_modelInputs.setText(f'{number_of_channels}')
         self._channels_mapping.set_number_of_model_inputs(number_of_channels)
+        self._default_channels_mapping = None
         self.regenerate_mapping()
 
     def set_rlayer(self, rlayer: QgsRasterLayer):
@@ -133,6 +139,7 @@ class InputChannelsMappingWidget(QtWidgets.QWidget, FORM_CLASS):
 
         self.label_imageInputs.setText(f'{len(image_channels)}')
         self._channels_mapping.set_image_channels(image_channels)
+        self._default_channels_mapping = None
         self.regenerate_mapping()
 
     def _combobox_index_changed(self, model_input_channel_number):
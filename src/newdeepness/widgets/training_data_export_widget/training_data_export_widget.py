@@ -5,15 +5,15 @@ This file contains a single widget, which is embedded in the main dockwiget - to
 import os
 
 from qgis.core import QgsMapLayerProxyModel, QgsProject
-from qgis.PyQt import QtWidgets, uic
+from qgis.PyQt import QtWidgets
 from qgis.PyQt.QtWidgets import QFileDialog
 
 from newdeepness.common.config_entry_key import ConfigEntryKey
 from newdeepness.common.processing_parameters.map_processing_parameters import MapProcessingParameters
 from newdeepness.common.processing_parameters.training_data_export_parameters import TrainingDataExportParameters
+from newdeepness.common.ui_form_loader import load_ui_form_class
 
-FORM_CLASS, _ = uic.loadUiType(os.path.join(
-    os.path.dirname(__file__), 'training_data_export_widget.ui'))
+FORM_CLASS = load_ui_form_class(os.path.join(os.path.dirname(__file__), 'training_data_export_widget.ui'))
 
 
 class TrainingDataExportWidget(QtWidgets.QWidget, FORM_CLASS):
@@ -86,7 +86,7 @@ class TrainingDataExportWidget(QtWidgets.QWidget, FORM_CLASS):
             segmentation_mask_layer_id = None
 
         params = TrainingDataExportParameters(
-            **map_processing_parameters.__dict__,
+            **map_processing_parameters.get_common_fields(),
             export_image_tiles=self.checkBox_exportImageTiles.isChecked(),
             segmentation_mask_layer_id=segmentation_mask_layer_id,
             output_directory_path=self.lineEdit_outputDirPath.text(),
@@ -0,0 +1,27 @@
+"""
+Fixtures shared between the tests.
+Session scoped ones are created once per test run, as their initialization is costly
+"""
+
+from test.test_utils import get_planes_model_path
+
+import pytest
+
+from newdeepness.processing.models import model_base
+from newdeepness.processing.models.detector import Detector
+
+
+@pytest.fixture(scope='session', autouse=True)
+def optimized_models_cache_dir(tmp_path_factory):
+    # not to fill the user cache with the optimized graphs of the test models
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        cache_dir_path = str(tmp_path_factory.mktemp('optimized_models'))
+        monkeypatch.setattr(model_base, 'OPTIMIZED_MODELS_CACHE_DIR_PATH', cache_dir_path)
+        yield cache_dir_path
+
+
+@pytest.fixture(scope='session')
+def planes_detector():
+    model_wrapper = Detector(get_planes_model_path())
+    model_wrapper.warmup()  # not to include the session initialization in the processing
+    return model_wrapper
@@ -38,6 +38,7 @@ def test_run_inference():
     ConfigEntryKey.PREPROCESSING_TILES_OVERLAP.set(44)
 
     dockwidget = DeepnessDockWidget(iface=MagicMock())
+    QgsApplication.processEvents()  # model from the config is loaded after the widget creation
 
     # set to different values to check if will be saved while running ui
     ConfigEntryKey.PROCESSED_AREA_TYPE.set(ProcessedAreaType.ENTIRE_LAYER.value)
@@ -80,6 +81,7 @@ def test_get_inference_parameters():
     ConfigEntryKey.MODEL_OUTPUT_FORMAT_CLASS_NUMBER.set(1)
 
     dockwidget = DeepnessDockWidget(iface=MagicMock())
+    QgsApplication.processEvents()  # model from the config is loaded after the widget creation
 
     params = dockwidget.get_inference_parameters()
     assert isinstance(params, SegmentationParameters)
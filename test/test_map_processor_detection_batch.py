@@ -0,0 +1,115 @@
+from test.test_utils import (create_default_input_channels_mapping_for_rgb_bands, create_rlayer_from_file,
+                             get_dummy_fotomap_small_path, init_qgis)
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from newdeepness.common.processing_parameters.detection_parameters import DetectionParameters
+from newdeepness.common.processing_parameters.map_processing_parameters import ModelOutputFormat, ProcessedAreaType
+from newdeepness.processing.map_processor.map_processor_detection import MapProcessorDetection
+from newdeepness.processing.models.detector import Detection, Detector
+from newdeepness.processing.processing_utils import BoundingBox
+
+RASTER_FILE_PATH = get_dummy_fotomap_small_path()
+
+INPUT_CHANNELS_MAPPING = create_default_input_channels_mapping_for_rgb_bands()
+
+DETECTION_SIZE_PX = 10
+
+
+def model_process_batch_mock(x):
+    # a single detection in the top left corner of each tile, with the tile mean value as confidence
+    return [[Detection(bbox=BoundingBox(x_min=0, x_max=DETECTION_SIZE_PX - 1, y_min=0, y_max=DETECTION_SIZE_PX - 1),
+                       conf=float(np.mean(img)) / 255,
+                       clss=0)]
+            for img in x]
+
+
+def create_dynamic_batch_model_mock(processed_batch_sizes: list):
+    def process_batch(x):
+        processed_batch_sizes.append(len(x))
+        return model_process_batch_mock(x)
+
+    model = MagicMock()
+    model.process_batch = process_batch
+    model.get_batch_size = lambda: None  # dynamic batch dimension
+    model.get_number_of_channels = lambda: 3
+    model.get_number_of_output_channels = lambda: 1
+    model.get_channel_name = lambda x: str(x)
+    model.non_max_suppression_fast = Detector.non_max_suppression_fast
+    return model
+
+
+def create_map_processor(rlayer, model, batch_size: int) -> MapProcessorDetection:
+    params = DetectionParameters(
+        resolution_cm_per_px=3,
+        tile_size_px=256,
+        processed_area_type=ProcessedAreaType.ENTIRE_LAYER,
+        mask_layer_id=None,
+        input_layer_id=rlayer.id(),
+        input_channels_mapping=INPUT_CHANNELS_MAPPING,
+        processing_overlap_percentage=0,
+        model=model,
+        confidence=0.5,
+        iou_threshold=0.4,
+        remove_overlapping_detections=False,
+        batch_size=batch_size,
+        model_output_format=ModelOutputFormat.ALL_CLASSES_AS_SEPARATE_LAYERS,
+        model_output_format__single_class_number=-1,
+    )
+
+    return MapProcessorDetection(
+        rlayer=rlayer,
+        vlayer_mask=None,
+        map_canvas=MagicMock(),
+        params=params,
+    )
+
+
+def test_map_processor_detection_dynamic_batch():
+    qgs = init_qgis()
+
+    rlayer = create_rlayer_from_file(RASTER_FILE_PATH)
+    processed_batch_sizes = []
+    model = create_dynamic_batch_model_mock(processed_batch_sizes)
+
+    # reference - tiles one by one
+    map_processor = create_map_processor(rlayer, model, batch_size=1)
+    tiles = list(map_processor.tiles_generator())
+    number_of_tiles = len(tiles)
+    assert number_of_tiles >= 3
+
+    # batch size for which the last batch is not full
+    batch_size = number_of_tiles // 2 + 1
+    map_processor = create_map_processor(rlayer, model, batch_size=batch_size)
+    assert map_processor._get_batch_size() == batch_size
+
+    batches = list(map_processor.tiles_generator_batched(map_processor._get_batch_size()))
+    assert [len(tiles_params) for _, tiles_params in batches] == [batch_size, number_of_tiles - batch_size]
+
+    # tiles are in the same order as without batching
+    batched_tile_imgs = np.concatenate([tile_imgs for tile_imgs, _ in batches])
+    batched_tiles_params = [tile_params for _, tiles_params in batches for tile_params in tiles_params]
+    np.testing.assert_array_equal(batched_tile_imgs, np.stack([tile_img for tile_img, _ in tiles]))
+    assert [(p.x_bin_number, p.y_bin_number) for p in batched_tiles_params] == \
+        [(p.x_bin_number, p.y_bin_number) for _, p in tiles]
+
+    # detections of each tile are placed at the tile position
+    for tile_imgs, tiles_params in batches:
+        detections = map_processor._process_tiles(tile_imgs, tiles_params)
+        assert len(detections) == len(tiles_params)
+        for detection, tile_params, tile_img in zip(detections, tiles_params, tile_imgs):
+            assert detection.bbox.x_min == tile_params.start_pixel_x
+            assert detection.bbox.y_min == tile_params.start_pixel_y
+            assert detection.bbox.x_max == tile_params.start_pixel_x + DETECTION_SIZE_PX - 1
+            assert detection.conf == float(np.mean(tile_img)) / 255
+
+    # the whole processing runs the model on the full batch and on the shorter last one
+    processed_batch_sizes.clear()
+    map_processor.run()
+    assert processed_batch_sizes == [batch_size, number_of_tiles - batch_size]
+
+
+if __name__ == '__main__':
+    test_map_processor_detection_dynamic_batch()
+    print('Done')
@@ -1,7 +1,10 @@
 import os
 from pathlib import Path
-from test.test_utils import create_default_input_channels_mapping_for_rgb_bands, create_rlayer_from_file, init_qgis
-from unittest.mock import MagicMock
+from test.test_utils import (create_default_input_channels_mapping_for_rgb_bands, create_rlayer_from_file,
+                             get_planes_model_path, init_qgis)
+from unittest.mock import Mock
+
+from qgis.gui import QgsMapCanvas
 
 from newdeepness.common.processing_parameters.detection_parameters import DetectionParameters
 from newdeepness.common.processing_parameters.map_processing_parameters import ModelOutputFormat, ProcessedAreaType
@@ -11,17 +14,15 @@ from newdeepness.processing.models.detector import Detector
 HOME_DIR = Path(__file__).resolve().parents[1]
 EXAMPLE_DATA_DIR = os.path.join(HOME_DIR, 'examples', 'yolov7_planes_detection_google_earth')
 
-MODEL_FILE_PATH = os.path.join(EXAMPLE_DATA_DIR, 'model_yolov7_tiny_planes_256_1c.onnx')
 RASTER_FILE_PATH = os.path.join(EXAMPLE_DATA_DIR, 'google_earth_planes_lawica.png')
 
 INPUT_CHANNELS_MAPPING = create_default_input_channels_mapping_for_rgb_bands()
 
 
-def test_map_processor_detection_planes_example():
-    qgs = init_qgis()
-
+def _run_planes_detection(model_wrapper: Detector,
+                          processing_overlap_percentage: float,
+                          remove_overlapping_detections: bool):
     rlayer = create_rlayer_from_file(RASTER_FILE_PATH)
-    model_wrapper = Detector(MODEL_FILE_PATH)
 
     params = DetectionParameters(
         resolution_cm_per_px=70,
@@ -30,11 +31,11 @@ def test_map_processor_detection_planes_example():
         mask_layer_id=None,
         input_layer_id=rlayer.id(),
         input_channels_mapping=INPUT_CHANNELS_MAPPING,
-        processing_overlap_percentage=60,
+        processing_overlap_percentage=processing_overlap_percentage,
         model=model_wrapper,
         confidence=0.5,
         iou_threshold=0.4,
-        remove_overlapping_detections=False,
+        remove_overlapping_detections=remove_overlapping_detections,
         model_output_format=ModelOutputFormat.ALL_CLASSES_AS_SEPARATE_LAYERS,
         model_output_format__single_class_number=-1,
     )
@@ -42,15 +43,38 @@ def test_map_processor_detection_planes_example():
     map_processor = MapProcessorDetection(
         rlayer=rlayer,
         vlayer_mask=None,
-        map_canvas=MagicMock(),
+        map_canvas=Mock(spec=QgsMapCanvas),  # not used when processing the entire layer
         params=params,
     )
 
     map_processor.run()
+    return map_processor.get_all_detections()
+
+
+def test_map_processor_detection_planes_example(planes_detector: Detector):
+    qgs = init_qgis()
+
+    detections = _run_planes_detection(
+        planes_detector, processing_overlap_percentage=60, remove_overlapping_detections=False)
+
+    assert len(detections) == 2
+
+
+def test_map_processor_detection_planes_example_with_overlapping_detections_removal(planes_detector: Detector):
+    qgs = init_qgis()
+
+    # smaller overlap - planes on the tiles edges are merged with the overlapping detections removal
+    detections = _run_planes_detection(
+        planes_detector, processing_overlap_percentage=20, remove_overlapping_detections=True)
 
-    assert len(map_processor.get_all_detections()) == 2
+    # each of the two planes is detected once - as with the bigger overlap, also with IoU 0.3-0.5
+    assert len(detections) == 2
+    assert detections[0].bbox.calculate_intersection_over_smaler_area(detections[1].bbox) < 0.4
 
 
 if __name__ == '__main__':
-    test_map_processor_detection_planes_example()
+    model_wrapper = Detector(get_planes_model_path())
+    model_wrapper.warmup()
+    test_map_processor_detection_planes_example(planes_detector=model_wrapper)
+    test_map_processor_detection_planes_example_with_overlapping_detections_removal(planes_detector=model_wrapper)
     print('Done')
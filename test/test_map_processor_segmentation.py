@@ -67,6 +67,10 @@ def model_process_mock(x):
     return np.transpose(x, (2, 0, 1))
 
 
+def model_process_batch_mock(x):
+    return [model_process_mock(img) for img in x]
+
+
 def test_generic_processing_test__specified_extent_from_vlayer():
     qgs = init_qgis()
 
@@ -74,6 +78,8 @@ def test_generic_processing_test__specified_extent_from_vlayer():
     vlayer_mask = create_vlayer_from_file(VLAYER_MASK_FILE_PATH)
     model = MagicMock()
     model.process = model_process_mock
+    model.process_batch = model_process_batch_mock
+    model.get_batch_size = lambda: 1
     model.get_number_of_channels = lambda: 2
     model.get_number_of_output_channels = lambda: 2
     model.get_channel_name = lambda x: str(x)
@@ -118,6 +124,8 @@ def test_generic_processing_test__specified_extent_from_vlayer_crs3857():
     vlayer_mask = create_vlayer_from_file(VLAYER_MASK_CRS3857_FILE_PATH)
     model = MagicMock()
     model.process = model_process_mock
+    model.process_batch = model_process_batch_mock
+    model.get_batch_size = lambda: 1
     model.get_number_of_channels = lambda: 2
     model.get_number_of_output_channels = lambda: 2
     model.get_channel_name = lambda x: str(x)
@@ -163,6 +171,8 @@ def test_generic_processing_test__specified_extent_from_active_map_extent():
     rlayer = create_rlayer_from_file(RASTER_FILE_PATH)
     model = MagicMock()
     model.process = model_process_mock
+    model.process_batch = model_process_batch_mock
+    model.get_batch_size = lambda: 1
     model.get_number_of_channels = lambda: 2
     model.get_number_of_output_channels = lambda: 2
     model.get_channel_name = lambda x: str(x)
@@ -185,7 +195,6 @@ def test_generic_processing_test__specified_extent_from_active_map_extent():
 
     # we want to use a fake extent, which is the Visible Part of the map,
     # so we need to mock its function calls
-    params.processed_area_type = ProcessedAreaType.VISIBLE_PART
     map_canvas = MagicMock()
     map_canvas.extent = lambda: processed_extent
     map_canvas.mapSettings().destinationCrs = lambda: QgsCoordinateReferenceSystem("EPSG:32633")
@@ -1,5 +1,8 @@
 from test.test_utils import get_dummy_segmentation_model_path
 
+import numpy as np
+import pytest
+
 from newdeepness.processing.models.model_base import ModelBase
 
 MODEL_FILE_PATH = get_dummy_segmentation_model_path()
@@ -10,7 +13,24 @@ def test_load_and_validate_metadata():
     assert model.get_input_shape() == [1, 3, 512, 512]
     assert model.get_number_of_channels() == 3
     assert model.get_input_size_in_pixels() == [512, 512]
+    assert model.get_batch_size() == 1
+
+
+def test_convert_image_to_input_type():
+    model = ModelBase(model_file_path=MODEL_FILE_PATH)
+    img = np.full((4, 4, 3), 255, dtype=np.uint8)
+
+    input_img = model._convert_image_to_input_type(img)
+    assert input_img.dtype == np.float32
+    np.testing.assert_allclose(input_img, 1.0)
+
+    # models with uint8 input get the raw values, but only from 8-bit rasters
+    model.input_dtype = np.uint8
+    assert model._convert_image_to_input_type(img) is img
+    with pytest.raises(Exception):
+        model._convert_image_to_input_type(img.astype(np.uint16))
 
 
 if __name__ == '__main__':
     test_load_and_validate_metadata()
+    test_convert_image_to_input_type()
@@ -9,6 +9,19 @@ def test_model_types():
     model_type = ModelType(a)
     model_definition = ModelDefinition.get_definition_for_type(model_type)
 
+    # model types behave as their string values
+    assert model_type == a
+    assert ModelDefinition.get_definition_for_type(a) is model_definition
+
+    # classes are imported lazily - check that the paths are valid and match the model types
+    for model_definition in ModelDefinition.get_model_definitions():
+        assert model_definition.model_class.get_class_display_name() == model_definition.model_type
+        assert model_definition.map_processor_class is not None
+
+    # definitions are shared, so they can't be modified
+    definitions_set = set(ModelDefinition.get_model_definitions())
+    assert len(definitions_set) == len(ModelType)
+
 
 if __name__ == '__main__':
     test_model_types()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+from unittest import mock
+
+from newdeepness.common import ui_form_loader
+
+UI_FILE_CONTENT_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<ui version="4.0">
+ <class>{name}</class>
+ <widget class="QWidget" name="{name}">
+ </widget>
+</ui>
+"""
+
+
+def _write_ui_file(ui_file_path: str, name: str, mtime: float):
+    with open(ui_file_path, 'w') as f:
+        f.write(UI_FILE_CONTENT_TEMPLATE.format(name=name))
+    os.utime(ui_file_path, (mtime, mtime))
+
+
+def test_ui_form_loader_cache_hit():
+    with tempfile.TemporaryDirectory() as tmp_dir_path, \
+            mock.patch.object(ui_form_loader, 'UI_CACHE_DIR_PATH', os.path.join(tmp_dir_path, 'cache')):
+        ui_file_path = os.path.join(tmp_dir_path, 'form.ui')
+        _write_ui_file(ui_file_path, name='Form', mtime=1000000)
+
+        form_class = ui_form_loader.load_ui_form_class(ui_file_path)
+        assert form_class.__name__ == 'Ui_Form'
+        assert len(os.listdir(ui_form_loader.UI_CACHE_DIR_PATH)) == 1
+
+        # the second load uses the cache - the ui file is not compiled again
+        with mock.patch.object(ui_form_loader, '_compile_ui_file', side_effect=AssertionError) as compile_mock:
+            form_class = ui_form_loader.load_ui_form_class(ui_file_path)
+        assert form_class.__name__ == 'Ui_Form'
+        compile_mock.assert_not_called()
+
+
+def test_ui_form_loader_cache_invalidated_on_ui_file_change():
+    with tempfile.TemporaryDirectory() as tmp_dir_path, \
+            mock.patch.object(ui_form_loader, 'UI_CACHE_DIR_PATH', os.path.join(tmp_dir_path, 'cache')):
+        ui_file_path = os.path.join(tmp_dir_path, 'form.ui')
+        _write_ui_file(ui_file_path, name='Form', mtime=1000000)
+        assert ui_form_loader.load_ui_form_class(ui_file_path).__name__ == 'Ui_Form'
+
+        # modified ui file (with a new mtime) is compiled again
+        _write_ui_file(ui_file_path, name='ModifiedForm', mtime=1000001)
+        assert ui_form_loader.load_ui_form_class(ui_file_path).__name__ == 'Ui_ModifiedForm'
+        assert len(os.listdir(ui_form_loader.UI_CACHE_DIR_PATH)) == 2
+
+
+def test_ui_form_loader_corrupted_cache_file():
+    with tempfile.TemporaryDirectory() as tmp_dir_path, \
+            mock.patch.object(ui_form_loader, 'UI_CACHE_DIR_PATH', os.path.join(tmp_dir_path, 'cache')):
+        ui_file_path = os.path.join(tmp_dir_path, 'form.ui')
+        _write_ui_file(ui_file_path, name='Form', mtime=1000000)
+        ui_form_loader.load_ui_form_class(ui_file_path)
+
+        cache_file_path = ui_form_loader._get_cache_file_path(ui_file_path)
+        for corrupted_content in [b'', b'not a marshalled code']:
+            with open(cache_file_path, 'wb') as f:
+                f.write(corrupted_content)
+
+            # the ui file is compiled again, and the cache file is fixed
+            assert ui_form_loader.load_ui_form_class(ui_file_path).__name__ == 'Ui_Form'
+            with mock.patch.object(ui_form_loader, '_compile_ui_file', side_effect=AssertionError):
+                assert ui_form_loader.load_ui_form_class(ui_file_path).__name__ == 'Ui_Form'
+
+
+def test_ui_form_loader_unwritable_cache_dir():
+    with tempfile.TemporaryDirectory() as tmp_dir_path:
+        ui_file_path = os.path.join(tmp_dir_path, 'form.ui')
+        _write_ui_file(ui_file_path, name='Form', mtime=1000000)
+
+        # cache directory can't be created - there is a file in its place
+        not_a_dir_path = os.path.join(tmp_dir_path, 'not_a_dir')
+        with open(not_a_dir_path, 'w'):
+            pass
+
+        with mock.patch.object(ui_form_loader, 'UI_CACHE_DIR_PATH', os.path.join(not_a_dir_path, 'cache')):
+            assert ui_form_loader.load_ui_form_class(ui_file_path).__name__ == 'Ui_Form'
+            assert ui_form_loader.load_ui_form_class(ui_file_path).__name__ == 'Ui_Form'
+
+
+if __name__ == '__main__':
+    test_ui_form_loader_cache_hit()
+    test_ui_form_loader_cache_invalidated_on_ui_file_change()
+    test_ui_form_loader_corrupted_cache_file()
+    test_ui_form_loader_unwritable_cache_dir()
+    print('Done')
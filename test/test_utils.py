@@ -32,6 +32,13 @@ def get_dummy_superresolution_model_path():
     """
     return os.path.join(TEST_DATA_DIR, 'dummy_model', 'dummy_superresolution_model.onnx')
 
+def get_planes_model_path():
+    """
+    Get path of the planes detection model (YOLOv7 tiny), from the 'yolov7_planes_detection_google_earth' example
+    """
+    return os.path.join(os.path.dirname(SCRIPT_DIR), 'examples', 'yolov7_planes_detection_google_earth',
+                        'model_yolov7_tiny_planes_256_1c.onnx')
+
 def get_dummy_fotomap_small_path():
     """
     Get path of dummy fotomap tif file, which can be used
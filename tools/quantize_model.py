@@ -0,0 +1,14 @@
+"""
+This script allows you to quantize a model in ONNX, to speed up the inference on CPU.
+Weights are converted to int8 (dynamic quantization) - the model inputs and outputs stay the same,
+so the quantized model can be used in the plugin in the same way as the original one.
+Check the model results after the quantization, as the accuracy may be slightly lower.
+"""
+
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+quantize_dynamic(
+    model_input='/path/to/model.onnx',
+    model_output='path/where/the/quantized/model/will/be/saved.onnx',
+    weight_type=QuantType.QInt8,
+)